@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,17 +41,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'drf_yasg',
     'products'
 ]
 
 MIDDLEWARE = [
+    # Đặt đầu tiên để đo toàn bộ thời gian xử lý request
+    'products.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'products.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -125,6 +132,43 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Số worker process của uvicorn (Dockerfile, entrypoint.sh); state trong bộ nhớ không dùng chung giữa các worker
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# PRODUCT_CACHE_BACKEND: locmem | file | redis (redis cần cài thêm package `redis`)
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+# Nhiều worker: version cache (invalidate) phải nằm ở backend dùng chung, mặc định `file`
+# (dùng chung trong một container); nhiều container thì dùng `redis`
+PRODUCT_CACHE_BACKEND = os.getenv('PRODUCT_CACHE_BACKEND', 'locmem' if WEB_CONCURRENCY == 1 else 'file')
+if PRODUCT_CACHE_BACKEND == 'locmem' and WEB_CONCURRENCY > 1:
+    raise ImproperlyConfigured(
+        'PRODUCT_CACHE_BACKEND=locmem chỉ dùng được với WEB_CONCURRENCY=1: '
+        'invalidate ở một worker không tới được cache của các worker khác'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'products': {
+        'BACKEND': CACHE_BACKENDS[PRODUCT_CACHE_BACKEND],
+        # locmem: tên vùng nhớ, file: thư mục, redis: redis://host:6379/0
+        'LOCATION': os.getenv(
+            'PRODUCT_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'product-cache') if PRODUCT_CACHE_BACKEND == 'file' else 'products'
+        ),
+    },
+}
+if PRODUCT_CACHE_BACKEND != 'redis':
+    CACHES['products']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
@@ -139,10 +183,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework configuration
 REST_FRAMEWORK = {
+    # Browsable API chỉ bật khi DEBUG, production chỉ render JSON
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.MultiPartParser',
@@ -159,3 +203,114 @@ MINIO_SECRET_KEY = 'minioadmin123'
 MINIO_USE_SSL = False
 MINIO_BUCKET_NAME = 'products'
 MINIO_PUBLIC_URL = os.getenv('MINIO_PUBLIC_URL', 'http://localhost:9000') 
+
+# Cursor pagination cho /api/products/ và /api/products/pending/
+PRODUCT_CURSOR_PAGE_SIZE = int(os.getenv('PRODUCT_CURSOR_PAGE_SIZE', '50'))
+PRODUCT_CURSOR_MAX_PAGE_SIZE = int(os.getenv('PRODUCT_CURSOR_MAX_PAGE_SIZE', '500'))
+
+# Claim/lease sản phẩm pending cho n8n workers
+PRODUCT_CLAIM_MAX_BATCH = int(os.getenv('PRODUCT_CLAIM_MAX_BATCH', '100'))
+PRODUCT_CLAIM_DEFAULT_LEASE_SECONDS = int(os.getenv('PRODUCT_CLAIM_DEFAULT_LEASE_SECONDS', '300'))
+PRODUCT_CLAIM_MAX_LEASE_SECONDS = int(os.getenv('PRODUCT_CLAIM_MAX_LEASE_SECONDS', '3600'))
+
+# Bulk endpoints
+PRODUCT_BULK_MAX_ITEMS = int(os.getenv('PRODUCT_BULK_MAX_ITEMS', '10000'))
+PRODUCT_BULK_BATCH_SIZE = int(os.getenv('PRODUCT_BULK_BATCH_SIZE', '1000'))
+
+# Streaming export (/api/products/export/): số row mỗi lần fetch từ server-side cursor
+PRODUCT_EXPORT_CHUNK_SIZE = int(os.getenv('PRODUCT_EXPORT_CHUNK_SIZE', '2000'))
+
+# Async image upload: số worker thread và thư mục lưu file tạm của job
+PRODUCT_UPLOAD_WORKERS = int(os.getenv('PRODUCT_UPLOAD_WORKERS', '4'))
+PRODUCT_UPLOAD_JOB_DIR = os.getenv('PRODUCT_UPLOAD_JOB_DIR', os.path.join(tempfile.gettempdir(), 'product-upload-jobs'))
+# Job pending/processing lâu hơn số giây này được coi là bị bỏ dở (manage.py recover_image_upload_jobs)
+PRODUCT_UPLOAD_JOB_STALE_SECONDS = int(os.getenv('PRODUCT_UPLOAD_JOB_STALE_SECONDS', '600'))
+
+# Presigned POST upload thẳng lên MinIO (giây)
+MINIO_PRESIGNED_UPLOAD_EXPIRY = int(os.getenv('MINIO_PRESIGNED_UPLOAD_EXPIRY', '600'))
+
+# Ảnh derivative (thumbnail) sinh sau khi upload: chiều rộng (px) và format
+PRODUCT_IMAGE_VARIANT_WIDTHS = [int(w) for w in os.getenv('PRODUCT_IMAGE_VARIANT_WIDTHS', '200,600').split(',') if w]
+PRODUCT_IMAGE_VARIANT_FORMATS = [f for f in os.getenv('PRODUCT_IMAGE_VARIANT_FORMATS', 'webp,avif').split(',') if f]
+PRODUCT_IMAGE_VARIANT_QUALITY = int(os.getenv('PRODUCT_IMAGE_VARIANT_QUALITY', '80'))
+PRODUCT_IMAGE_VARIANT_PROCESSES = int(os.getenv('PRODUCT_IMAGE_VARIANT_PROCESSES', '2'))
+
+# MinIO client: connection pool, timeout và retry
+MINIO_REGION = os.getenv('MINIO_REGION', 'us-east-1')
+MINIO_POOL_NUM_POOLS = int(os.getenv('MINIO_POOL_NUM_POOLS', '10'))
+MINIO_POOL_MAXSIZE = int(os.getenv('MINIO_POOL_MAXSIZE', '32'))
+MINIO_POOL_BLOCK = os.getenv('MINIO_POOL_BLOCK', 'False') == 'True'
+MINIO_CONNECT_TIMEOUT = float(os.getenv('MINIO_CONNECT_TIMEOUT', '5'))
+MINIO_READ_TIMEOUT = float(os.getenv('MINIO_READ_TIMEOUT', '60'))
+MINIO_MAX_RETRIES = int(os.getenv('MINIO_MAX_RETRIES', '3'))
+MINIO_RETRY_BACKOFF = float(os.getenv('MINIO_RETRY_BACKOFF', '0.2'))
+
+# Xóa ảnh trên MinIO: số object mỗi batch và tự drain ở background sau mỗi lần enqueue
+PRODUCT_IMAGE_DELETE_BATCH_SIZE = int(os.getenv('PRODUCT_IMAGE_DELETE_BATCH_SIZE', '1000'))
+PRODUCT_IMAGE_DELETE_AUTO_DRAIN = os.getenv('PRODUCT_IMAGE_DELETE_AUTO_DRAIN', 'True') == 'True'
+# Thời gian (giây) một drainer giữ batch đang xóa, phải lớn hơn thời gian một request
+# multi-object delete; hết lease thì batch được drainer khác xóa lại
+PRODUCT_IMAGE_DELETE_LEASE_SECONDS = float(os.getenv('PRODUCT_IMAGE_DELETE_LEASE_SECONDS', '120'))
+
+# Cache presigned GET URL: số entry tối đa, làm mới khi hiệu lực còn dưới tỉ lệ này,
+# và Django cache alias dùng chung giữa các process (None = chỉ cache trong process)
+MINIO_PRESIGNED_URL_CACHE_SIZE = int(os.getenv('MINIO_PRESIGNED_URL_CACHE_SIZE', '10000'))
+MINIO_PRESIGNED_URL_CACHE_REFRESH_RATIO = float(os.getenv('MINIO_PRESIGNED_URL_CACHE_REFRESH_RATIO', '0.2'))
+MINIO_PRESIGNED_URL_CACHE_BACKEND = os.getenv('MINIO_PRESIGNED_URL_CACHE_BACKEND') or None
+
+# Cache response cho list/pending/retrieve của ProductViewSet (giây)
+PRODUCT_CACHE_ENABLED = os.getenv('PRODUCT_CACHE_ENABLED', 'True') == 'True'
+PRODUCT_CACHE_ALIAS = 'products'
+PRODUCT_CACHE_TIMEOUT = int(os.getenv('PRODUCT_CACHE_TIMEOUT', '60'))
+
+# Webhook nhận thay đổi của Product (transactional outbox, xem products/outbox.py):
+# danh sách URL phân cách bằng dấu phẩy (rỗng = tắt), secret để ký HMAC header X-Webhook-Signature
+PRODUCT_WEBHOOK_URLS = [url for url in os.getenv('PRODUCT_WEBHOOK_URLS', '').split(',') if url]
+PRODUCT_WEBHOOK_SECRET = os.getenv('PRODUCT_WEBHOOK_SECRET', '')
+PRODUCT_WEBHOOK_TIMEOUT = float(os.getenv('PRODUCT_WEBHOOK_TIMEOUT', '10'))
+# Số event mỗi batch, tự dispatch ở background sau commit, retry với exponential backoff (giây)
+PRODUCT_OUTBOX_BATCH_SIZE = int(os.getenv('PRODUCT_OUTBOX_BATCH_SIZE', '100'))
+PRODUCT_OUTBOX_AUTO_DISPATCH = os.getenv('PRODUCT_OUTBOX_AUTO_DISPATCH', 'True') == 'True'
+PRODUCT_OUTBOX_MAX_ATTEMPTS = int(os.getenv('PRODUCT_OUTBOX_MAX_ATTEMPTS', '10'))
+PRODUCT_OUTBOX_RETRY_BACKOFF = float(os.getenv('PRODUCT_OUTBOX_RETRY_BACKOFF', '5'))
+PRODUCT_OUTBOX_RETRY_MAX_DELAY = float(os.getenv('PRODUCT_OUTBOX_RETRY_MAX_DELAY', '3600'))
+# Thời gian (giây) một dispatcher giữ batch đang gửi, phải lớn hơn thời gian POST cả batch
+# (PRODUCT_WEBHOOK_TIMEOUT x số webhook URL); hết lease thì batch được dispatcher khác gửi lại
+PRODUCT_OUTBOX_LEASE_SECONDS = float(os.getenv('PRODUCT_OUTBOX_LEASE_SECONDS', '300'))
+
+# Change feed (GET /api/products/changes/?since=): số change mỗi trang (mặc định và tối đa)
+PRODUCT_CHANGES_PAGE_SIZE = int(os.getenv('PRODUCT_CHANGES_PAGE_SIZE', '500'))
+PRODUCT_CHANGES_MAX_PAGE_SIZE = int(os.getenv('PRODUCT_CHANGES_MAX_PAGE_SIZE', '5000'))
+
+# Metrics hiệu năng (GET /metrics/, header Server-Timing) và log timing JSON mỗi request
+PRODUCT_METRICS_ENABLED = os.getenv('PRODUCT_METRICS_ENABLED', 'True') == 'True'
+# Thư mục chung cho snapshot metrics của các worker ('' = chỉ giữ trong bộ nhớ, 1 worker)
+# và chu kỳ (giây) mỗi worker ghi snapshot
+PRODUCT_METRICS_DIR = os.getenv(
+    'PRODUCT_METRICS_DIR',
+    '' if WEB_CONCURRENCY == 1 else os.path.join(tempfile.gettempdir(), 'product-metrics')
+)
+PRODUCT_METRICS_FLUSH_INTERVAL = float(os.getenv('PRODUCT_METRICS_FLUSH_INTERVAL', '1'))
+# GET /metrics/ chỉ cho staff hoặc request có header `Authorization: Bearer <token>`
+PRODUCT_METRICS_TOKEN = os.getenv('PRODUCT_METRICS_TOKEN', '')
+PRODUCT_TIMING_LOG_ENABLED = os.getenv('PRODUCT_TIMING_LOG_ENABLED', 'False') == 'True'
+
+# Profile request (cProfile + SQL): bật theo header/param cho staff hoặc token, hoặc lấy mẫu theo tỉ lệ
+PRODUCT_PROFILING_ENABLED = os.getenv('PRODUCT_PROFILING_ENABLED', 'False') == 'True'
+PRODUCT_PROFILING_TOKEN = os.getenv('PRODUCT_PROFILING_TOKEN', '')
+PRODUCT_PROFILING_SAMPLE_RATE = float(os.getenv('PRODUCT_PROFILING_SAMPLE_RATE', '0'))
+PRODUCT_PROFILING_DIR = os.getenv('PRODUCT_PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'product-profiles'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'loggers': {
+        'products': {'handlers': ['console'], 'level': os.getenv('PRODUCT_LOG_LEVEL', 'INFO')},
+    },
+}
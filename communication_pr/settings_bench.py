@@ -0,0 +1,23 @@
+"""
+Settings cho `python manage.py benchmark` chạy offline
+
+Dùng SQLite thay cho Postgres và MinIO giả lập (cài trong command), không cần
+docker-compose. Muốn đo trên Postgres thật thì chạy command với settings mặc định.
+"""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # Đặt ngoài repo để không để lại file DB trong working tree
+        'NAME': os.path.join(tempfile.gettempdir(), 'product-benchmark.sqlite3'),
+    }
+}
+
+DEBUG = False
+
+# Hàng đợi xóa ảnh không cần drain trong lúc đo
+PRODUCT_IMAGE_DELETE_AUTO_DRAIN = False
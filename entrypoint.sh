@@ -20,6 +20,10 @@ echo "✅ MinIO is ready!"
 echo "📦 Running migrations..."
 python manage.py migrate --noinput
 
+# Job upload ảnh bị bỏ dở khi server dừng (worker pool nằm trong process của server)
+echo "🔁 Recovering interrupted image upload jobs..."
+python manage.py recover_image_upload_jobs --stale-seconds 0
+
 # Khởi tạo MinIO bucket
 echo "🗂️ Initializing MinIO bucket..."
 python init_minio.py || echo "⚠️ MinIO initialization warning (will retry on first upload)"
@@ -28,5 +32,5 @@ python init_minio.py || echo "⚠️ MinIO initialization warning (will retry on
 # python manage.py collectstatic --noinput
 
 # Start server
-echo "🎉 Starting Django server..."
-python manage.py runserver 0.0.0.0:8000
+echo "🎉 Starting Django server (ASGI)..."
+exec uvicorn communication_pr.asgi:application --host 0.0.0.0 --port 8000 --workers "${WEB_CONCURRENCY:-4}"
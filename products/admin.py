@@ -1,3 +1,41 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OutboxEvent
+from .outbox import purge_dead_events, requeue_dead_events
+
+
+class DeadEventFilter(admin.SimpleListFilter):
+    title = 'trạng thái'
+    parameter_name = 'dead'
+
+    def lookups(self, request, model_admin):
+        return (('1', 'Hết số lần retry'), ('0', 'Đang chờ gửi'))
+
+    def queryset(self, request, queryset):
+        if self.value() == '1':
+            return queryset.filter(next_attempt_at__isnull=True)
+        if self.value() == '0':
+            return queryset.filter(next_attempt_at__isnull=False)
+        return queryset
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    """Theo dõi outbox webhook, gửi lại hoặc xóa event đã hết số lần retry"""
+    list_display = ('id', 'event_type', 'product_id', 'target_url', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = (DeadEventFilter, 'event_type', 'target_url')
+    search_fields = ('product_id', 'last_error')
+    readonly_fields = ('event_type', 'product_id', 'payload', 'target_url', 'attempts', 'last_error',
+                       'next_attempt_at', 'created_at')
+    actions = ('requeue', 'purge')
+
+    @admin.action(description='Gửi lại event đã hết số lần retry')
+    def requeue(self, request, queryset):
+        self.message_user(request, f'Đã đưa {requeue_dead_events(queryset)} event vào hàng đợi')
+
+    @admin.action(description='Xóa event đã hết số lần retry')
+    def purge(self, request, queryset):
+        self.message_user(request, f'Đã xóa {purge_dead_events(queryset)} event')
+
+    def has_add_permission(self, request):
+        return False
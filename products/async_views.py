@@ -0,0 +1,183 @@
+"""
+Async views cho các endpoint đọc và upload ảnh của Product (chạy dưới ASGI)
+
+Truy vấn DB dùng async ORM của Django; các bước blocking (parse multipart, MinIO SDK,
+ghi DB) được đẩy sang thread qua `sync_to_async`, nên event loop không bị chặn
+và một process giữ được rất nhiều request đang chờ I/O cùng lúc.
+
+Đây là API rút gọn, không thay thế được /api/products/: format của từng sản phẩm giống
+ProductViewSet, nhưng list/pending chỉ hỗ trợ `fields`/`exclude` và phân trang keyset
+`page_size`/`after=<id>` (không phải `cursor=` của DRF); không có `q`, bộ lọc, `ordering`,
+response cache và ETag/304.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import serializers
+
+from .images import replace_product_image
+from .jobs import enqueue_image_upload
+from .models import Product
+from .renderers import ORJSONRenderer
+from .serializers import (
+    ImageUploadJobSerializer,
+    ProductImageUploadSerializer,
+    ProductListSerializer,
+    ProductSerializer,
+    ValuesRepresentation,
+    parse_sparse_fields,
+)
+from .uploads import ImageStreamUploadHandler
+
+_renderer = ORJSONRenderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+
+
+def _get_representation(request, serializer_class):
+    """ValuesRepresentation theo `?fields=`/`?exclude=`; raise ValidationError nếu field sai"""
+    fields = parse_sparse_fields(request.GET, list(serializer_class.Meta.fields))
+    return ValuesRepresentation(serializer_class, fields)
+
+
+def _get_page_size(request):
+    """`page_size` (None nếu không gửi), giới hạn bởi PRODUCT_CURSOR_MAX_PAGE_SIZE"""
+    value = request.GET.get('page_size')
+    if value is None and 'after' not in request.GET:
+        return None
+    try:
+        page_size = int(value) if value is not None else settings.PRODUCT_CURSOR_PAGE_SIZE
+    except ValueError:
+        raise serializers.ValidationError({'page_size': f"Giá trị không hợp lệ: {value}"})
+    if page_size < 1:
+        raise serializers.ValidationError({'page_size': 'Phải lớn hơn 0'})
+    return min(page_size, settings.PRODUCT_CURSOR_MAX_PAGE_SIZE)
+
+
+async def _list_response(request, queryset):
+    """
+    Bản rút gọn của ProductViewSet._list_response (không lọc, không sắp xếp, không cache)
+
+    Không gửi `page_size`/`after` thì trả {count, results}; ngược lại phân trang
+    keyset theo id: {next, results}, `next` chứa `after=<id cuối trang>`.
+    """
+    try:
+        representation = _get_representation(request, ProductListSerializer)
+        page_size = _get_page_size(request)
+        after = int(request.GET.get('after', 0))
+    except serializers.ValidationError as exc:
+        return json_response(exc.detail, status=400)
+    except ValueError:
+        return json_response({'after': f"Giá trị không hợp lệ: {request.GET['after']}"}, status=400)
+
+    # Luôn đọc id để tạo link trang sau, bỏ đi nếu client không yêu cầu
+    extra_fields = [] if 'id' in representation.fields else ['id']
+    queryset = queryset.order_by('id').values(*representation.fields, *extra_fields)
+
+    if page_size is None:
+        rows = [row async for row in queryset]
+        return json_response({
+            'count': len(rows),
+            'results': representation.to_representation(rows, extra_fields)
+        })
+
+    # Lấy dư một row để biết còn trang sau hay không
+    rows = [row async for row in queryset.filter(id__gt=after)[:page_size + 1]]
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        params = request.GET.copy()
+        params['after'] = rows[-1]['id']
+        next_url = request.build_absolute_uri('?' + params.urlencode())
+
+    return json_response({
+        'next': next_url,
+        'results': representation.to_representation(rows, extra_fields)
+    })
+
+
+@require_GET
+async def product_list(request):
+    """
+    Lấy danh sách sản phẩm
+    GET /api/async/products/
+    """
+    return await _list_response(request, Product.objects.all())
+
+
+@require_GET
+async def pending_products(request):
+    """
+    Lấy danh sách sản phẩm chưa xử lý (status = False)
+    GET /api/async/products/pending/
+    """
+    return await _list_response(request, Product.objects.filter(status=False))
+
+
+@require_GET
+async def product_detail(request, pk):
+    """
+    Lấy chi tiết một sản phẩm
+    GET /api/async/products/{id}/
+    """
+    try:
+        representation = _get_representation(request, ProductSerializer)
+    except serializers.ValidationError as exc:
+        return json_response(exc.detail, status=400)
+
+    row = await Product.objects.filter(pk=pk).values(*representation.fields).afirst()
+    if row is None:
+        return json_response({'error': 'Không tìm thấy sản phẩm'}, status=404)
+    return json_response(representation.to_representation([row])[0])
+
+
+def _upload_image(request, product, run_async):
+    """Phần blocking của upload (parse multipart, hash, MinIO, DB), chạy trong thread"""
+    request.upload_handlers = [ImageStreamUploadHandler(request)]
+    try:
+        files = request.FILES
+    except serializers.ValidationError as exc:
+        return exc.detail, 400
+    serializer = ProductImageUploadSerializer(data=files)
+    if not serializer.is_valid():
+        return serializer.errors, 400
+    image_file = serializer.validated_data['image']
+
+    if run_async:
+        job = enqueue_image_upload(product, image_file)
+        return ImageUploadJobSerializer(job).data, 202
+
+    stored = replace_product_image(product, image_file)
+    if not stored:
+        return {'error': 'Không thể upload ảnh lên MinIO'}, 500
+
+    return {
+        'id': product.id,
+        'image': stored.url,
+        'deduplicated': not stored.created,
+        'bytes_saved': 0 if stored.created else stored.size,
+        'message': 'Upload ảnh thành công'
+    }, 200
+
+
+@csrf_exempt
+@require_POST
+async def upload_image(request, pk):
+    """
+    Upload ảnh cho sản phẩm
+    POST /api/async/products/{id}/upload-image/
+    Body (form-data):
+        image: file
+    """
+    try:
+        product = await Product.objects.defer('search_vector').aget(pk=pk)
+    except Product.DoesNotExist:
+        return json_response({'error': 'Không tìm thấy sản phẩm'}, status=404)
+
+    run_async = request.GET.get('async', '').lower() in ('1', 'true', 'yes')
+    data, status = await sync_to_async(_upload_image)(request, product, run_async)
+    return json_response(data, status=status)
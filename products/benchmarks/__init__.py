@@ -0,0 +1,3 @@
+"""
+Benchmark cho Product API (chạy bằng `python manage.py benchmark`)
+"""
@@ -0,0 +1,189 @@
+"""
+Chạy các kịch bản benchmark qua toàn bộ stack Django (middleware, DRF, ORM)
+bằng test client in-process, đo latency, throughput và số query mỗi request
+"""
+import io
+import math
+import random
+import time
+from dataclasses import asdict, dataclass
+
+from django.db import connection
+from django.db.models import Max, Min
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from products.models import Product
+
+SEED_BATCH_SIZE = 5000
+BULK_ITEMS = 100
+# Endpoint trả toàn bộ catalog (không phân trang) chỉ đo ở kích thước nhỏ
+FULL_LIST_MAX_ROWS = 10000
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    rows: int
+    cache: bool
+    requests: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    rps: float
+    queries_per_request: float
+    errors: int
+
+
+def percentile(sorted_values, percent):
+    """Percentile theo nearest-rank của danh sách đã sort"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def make_png(seed: int) -> io.BytesIO:
+    """Ảnh PNG nhỏ, nội dung khác nhau theo seed (tránh bị dedup)"""
+    buffer = io.BytesIO()
+    color = (seed % 256, (seed // 256) % 256, (seed // 65536) % 256)
+    Image.new('RGB', (640, 480), color).save(buffer, 'PNG')
+    buffer.seek(0)
+    buffer.name = f'bench-{seed}.png'
+    return buffer
+
+
+class BenchmarkRunner:
+    def __init__(self, requests: int, warmup: int, stdout=None):
+        self.requests = requests
+        self.warmup = warmup
+        self.stdout = stdout
+        self.client = APIClient()
+        self.random = random.Random(0)
+        self.image_seed = 0
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def seed(self, rows: int):
+        """Thêm product cho đủ `rows` row (một nửa pending, một nửa đã đăng)"""
+        existing = Product.objects.count()
+        self.log(f"Seeding {rows - existing} product(s) (total {rows})...")
+        for start in range(existing, rows, SEED_BATCH_SIZE):
+            Product.objects.bulk_create([
+                Product(
+                    name=f'Sản phẩm {i}',
+                    price=(i * 7919) % 10_000_000,
+                    description=f'Mô tả sản phẩm {i}. ' * 10,
+                    status=i % 2 == 1,
+                    image='',
+                    post_id=str(i) if i % 2 == 1 else ''
+                )
+                for i in range(start, min(start + SEED_BATCH_SIZE, rows))
+            ])
+        id_range = Product.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        self.min_id, self.max_id = id_range['min_id'], id_range['max_id']
+
+    def random_id(self) -> int:
+        return self.random.randint(self.min_id, self.max_id)
+
+    def measure(self, name: str, rows: int, cache: bool, send, expected_status: int) -> ScenarioResult:
+        for _ in range(self.warmup):
+            send()
+
+        latencies = []
+        query_count = errors = 0
+        for _ in range(self.requests):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = send()
+                latencies.append(time.perf_counter() - started)
+            query_count += len(queries.captured_queries)
+            if response.status_code != expected_status:
+                errors += 1
+
+        latencies.sort()
+        total = sum(latencies)
+        result = ScenarioResult(
+            scenario=name,
+            rows=rows,
+            cache=cache,
+            requests=self.requests,
+            p50_ms=round(percentile(latencies, 50) * 1000, 3),
+            p95_ms=round(percentile(latencies, 95) * 1000, 3),
+            p99_ms=round(percentile(latencies, 99) * 1000, 3),
+            mean_ms=round(total / len(latencies) * 1000, 3),
+            rps=round(len(latencies) / total, 1) if total else 0.0,
+            queries_per_request=round(query_count / self.requests, 2),
+            errors=errors,
+        )
+        self.log(
+            f"  {name + (' [cache]' if cache else ''):<30} p50={result.p50_ms:>9.2f}ms p99={result.p99_ms:>9.2f}ms "
+            f"rps={result.rps:>9.1f} queries={result.queries_per_request:>5} errors={errors}"
+        )
+        return result
+
+    def scenarios(self, rows: int):
+        """(tên, hàm gửi request, status mong đợi) cho một kích thước dữ liệu"""
+        client = self.client
+
+        def bulk_items():
+            return [
+                {'name': f'Bulk {i}', 'price': 1000 + i, 'description': 'Benchmark'}
+                for i in range(BULK_ITEMS)
+            ]
+
+        def bulk_post_ids():
+            return {'items': [
+                {'id': self.random_id(), 'post_id': f'bench-{self.random.random()}'}
+                for _ in range(BULK_ITEMS)
+            ]}
+
+        def upload():
+            self.image_seed += 1
+            return client.post(
+                f'/api/products/{self.random_id()}/upload-image/',
+                {'image': make_png(self.image_seed)},
+                format='multipart'
+            )
+
+        scenarios = [
+            ('list_page', lambda: client.get('/api/products/?page_size=100'), 200),
+            ('list_page_sparse', lambda: client.get('/api/products/?page_size=100&fields=id,name,price'), 200),
+            ('pending_page', lambda: client.get('/api/products/pending/?page_size=100'), 200),
+            ('retrieve', lambda: client.get(f'/api/products/{self.random_id()}/'), 200),
+            ('create', lambda: client.post(
+                '/api/products/', {'name': 'Benchmark', 'price': 1000, 'description': 'Benchmark'}, format='json'
+            ), 201),
+            ('bulk_create', lambda: client.post('/api/products/bulk/', bulk_items(), format='json'), 201),
+            ('bulk_update_post_id', lambda: client.patch(
+                '/api/products/bulk-update-post-id/', bulk_post_ids(), format='json'
+            ), 200),
+            ('upload_image', upload, 200),
+        ]
+        if rows <= FULL_LIST_MAX_ROWS:
+            scenarios.insert(0, ('list_full', lambda: client.get('/api/products/'), 200))
+        return scenarios
+
+    def run(self, sizes, only=None, cache_modes=(False,)) -> list:
+        """
+        Chạy các kịch bản cho từng kích thước
+
+        Args:
+            cache_modes: Bật/tắt response cache cho mỗi lượt đo (VD: (False, True) đo cả hai,
+                kết quả tách riêng theo cột `cache`)
+        """
+        results = []
+        for rows in sorted(sizes):
+            self.seed(rows)
+            self.log(f"Rows: {rows}")
+            for cache in cache_modes:
+                with override_settings(PRODUCT_CACHE_ENABLED=cache):
+                    for name, send, expected_status in self.scenarios(rows):
+                        if only and name not in only:
+                            continue
+                        results.append(self.measure(name, rows, cache, send, expected_status))
+        return [asdict(result) for result in results]
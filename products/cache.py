@@ -0,0 +1,86 @@
+"""
+Cache response cho các action đọc của ProductViewSet
+
+Key có dạng `products:<version>:<action>:<path>`. Mọi thay đổi dữ liệu Product
+chỉ cần ghi một version mới (một lệnh SET) là toàn bộ response cũ tự hết hiệu lực,
+không phải tìm và xóa từng key.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+VERSION_KEY = 'products:version'
+
+
+def get_cache():
+    return caches[settings.PRODUCT_CACHE_ALIAS]
+
+
+def _new_version() -> str:
+    # Token ngẫu nhiên: không bao giờ trùng version cũ, kể cả khi key bị evict
+    return uuid.uuid4().hex
+
+
+def current_version() -> str:
+    """Version hiện tại của dữ liệu Product trong cache"""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump_version() -> None:
+    """
+    Ghi version mới thay vì INCR
+
+    `incr` của file/locmem cache là get + set không nguyên tử: hai worker bump cùng
+    lúc có thể ghi cùng một giá trị. Hai lần ghi token mới song song vẫn luôn cho
+    ra một version khác version cũ.
+    """
+    get_cache().set(VERSION_KEY, _new_version(), timeout=None)
+
+
+def invalidate_product_cache() -> None:
+    """
+    Làm mất hiệu lực toàn bộ response đã cache
+
+    Được thực hiện sau khi transaction commit, để request đọc song song
+    không cache lại dữ liệu cũ ngay sau khi invalidate.
+    """
+    transaction.on_commit(_bump_version)
+
+
+def cache_key(request, action: str) -> str:
+    path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"products:{current_version()}:{action}:{path_hash}"
+
+
+def cached_response(view_method):
+    """
+    Decorator cho action đọc của ViewSet: trả response đã cache nếu có,
+    ngược lại gọi view và cache `response.data` khi status là 200
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.PRODUCT_CACHE_ENABLED or request.method != 'GET':
+            return view_method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = cache_key(request, self.action)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view_method(self, request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            cache.set(key, response.data, timeout=settings.PRODUCT_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
@@ -0,0 +1,151 @@
+"""
+Change feed của Product: client đồng bộ (mirror) chỉ kéo phần thay đổi sau cursor `since`
+
+Mỗi lần product được tạo/sửa/xóa, một row ProductChange được ghi (signal post_save/
+post_delete, bulk_create/bulk_update thì ghi trực tiếp). Feed trả trạng thái hiện tại
+của product cho mỗi change, hoặc tombstone nếu product đã bị xóa.
+
+Cursor là (txid, id): id được cấp khi INSERT nhưng transaction commit theo thứ tự bất
+kỳ, nên trên Postgres feed sắp theo transaction id ghi change (trigger của migration
+0013) và chỉ trả change của transaction cũ hơn mọi transaction đang chạy
+(`pg_snapshot_xmin`). Change commit muộn luôn nằm sau cursor client đã lưu.
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Product, ProductChange
+from .serializers import ProductSerializer, ValuesRepresentation
+
+# Transaction id nhỏ nhất còn đang chạy, cùng snapshot với câu query của feed
+SNAPSHOT_XMIN_SQL = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+
+
+def record_changes(operation: str, product_ids) -> None:
+    """Ghi change cho các product, nên gọi trong transaction của thay đổi"""
+    ProductChange.objects.bulk_create(
+        [ProductChange(product_id=product_id, operation=operation) for product_id in product_ids],
+        batch_size=settings.PRODUCT_BULK_BATCH_SIZE
+    )
+
+
+def parse_cursor(value) -> tuple:
+    """
+    Cursor `since` dạng "<txid>:<id>" -> (txid, id)
+
+    Số nguyên đơn (cursor trước khi có txid) tương đương "0:<id>".
+
+    Raises:
+        ValueError: Cursor không hợp lệ
+    """
+    txid, _, change_id = str(value).rpartition(':')
+    cursor = (int(txid or 0), int(change_id))
+    if min(cursor) < 0:
+        raise ValueError(value)
+    return cursor
+
+
+def format_cursor(cursor: tuple) -> str:
+    return '{}:{}'.format(*cursor)
+
+
+def committed_txid_horizon():
+    """
+    Change có txid nhỏ hơn giá trị này đã commit (hoặc rollback) xong, None = không giới hạn
+
+    Trên DB khác Postgres (SQLite) các transaction ghi tuần tự nên id đã theo thứ tự commit.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    return RawSQL(SNAPSHOT_XMIN_SQL, [])
+
+
+def read_changes(since: tuple, limit: int):
+    """
+    Một trang change sau cursor `since` (txid, id)
+
+    Returns:
+        (results, next_since, has_more)
+    """
+    txid, change_id = since
+    changes = ProductChange.objects.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=change_id))
+    horizon = committed_txid_horizon()
+    if horizon is not None:
+        changes = changes.filter(txid__lt=horizon)
+    changes = list(
+        changes.order_by('txid', 'id')
+        .values_list('txid', 'id', 'product_id', 'operation')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_since = changes[-1][:2] if changes else since
+    return build_results(change[1:] for change in changes), next_since, has_more
+
+
+def build_results(changes) -> list:
+    """
+    Ghép change với dữ liệu hiện tại của product (một query cho cả trang)
+
+    Product thay đổi nhiều lần trong trang chỉ xuất hiện một lần, ở change cuối cùng.
+    """
+    latest = {}
+    for change_id, product_id, operation in changes:
+        latest.pop(product_id, None)
+        latest[product_id] = (change_id, operation)
+
+    representation = ValuesRepresentation(ProductSerializer)
+    live_ids = [
+        product_id for product_id, (_, operation) in latest.items()
+        if operation != ProductChange.OPERATION_DELETED
+    ]
+    rows = representation.to_representation(
+        list(Product.objects.filter(id__in=live_ids).values(*representation.fields))
+    )
+    products = {row['id']: row for row in rows}
+
+    results = []
+    for product_id, (change_id, operation) in latest.items():
+        data = products.get(product_id)
+        if data is None:
+            # Product đã bị xóa sau change này: trả tombstone
+            operation = ProductChange.OPERATION_DELETED
+        results.append({'change_id': change_id, 'op': operation, 'id': product_id, 'data': data})
+    return results
+
+
+def iter_changes_ndjson(since: tuple, chunk_size: int):
+    """
+    Stream toàn bộ change sau `since` dạng NDJSON theo từng chunk
+
+    Dòng cuối là {"next_since": <cursor>} để client lưu lại cho lần đồng bộ sau.
+    """
+    while True:
+        results, since, has_more = read_changes(since, chunk_size)
+        if results:
+            yield ''.join(
+                json.dumps(result, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')) + '\n'
+                for result in results
+            )
+        if not has_more:
+            break
+    yield json.dumps({'next_since': format_cursor(since)}) + '\n'
+
+
+def compact_changes() -> int:
+    """
+    Xóa change đã có change mới hơn của cùng product (feed luôn trả trạng thái hiện tại
+    nên client không mất dữ liệu), giữ change mới nhất và tombstone
+
+    Returns:
+        Số change đã xóa
+    """
+    newer = ProductChange.objects.filter(
+        Q(txid__gt=OuterRef('txid')) | Q(txid=OuterRef('txid'), id__gt=OuterRef('id')),
+        product_id=OuterRef('product_id')
+    )
+    deleted, _ = ProductChange.objects.filter(Exists(newer)).delete()
+    return deleted
@@ -0,0 +1,77 @@
+"""
+Conditional GET (ETag / Last-Modified) cho các action đọc của ProductViewSet
+
+Version của response được tính từ Max(`updated_at`) (dùng index) và version của
+response cache, nên client poll lại khi dữ liệu không đổi chỉ nhận 304 không có body.
+Danh sách chỉ validate bằng ETag; Last-Modified chỉ có ở response một sản phẩm.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import current_version
+
+
+def queryset_version(queryset):
+    """
+    Version của một danh sách sản phẩm: (token, None)
+
+    Thêm/sửa row làm tăng Max(updated_at). Xóa row hoặc row rời khỏi danh sách
+    không làm tăng Max nên token kèm version của cache, được tăng sau mọi thao tác
+    ghi (xem products/cache.py); không cần COUNT toàn bộ danh sách mỗi lần poll.
+
+    Không trả last_modified: Max(updated_at) giữ nguyên khi xóa row, nên
+    If-Modified-Since sẽ trả 304 cho danh sách đã đổi. Danh sách chỉ dùng ETag.
+    """
+    last_modified = queryset.aggregate(last_modified=Max('updated_at'))['last_modified']
+    token = f"{current_version()}:{last_modified.isoformat() if last_modified else ''}"
+    return token, None
+
+
+def object_version(queryset):
+    """Version của một sản phẩm: (token, last_modified), (None, None) nếu không tồn tại"""
+    row = queryset.values_list('id', 'updated_at').first()
+    if row is None:
+        return None, None
+    product_id, updated_at = row
+    return f"{product_id}:{updated_at.isoformat()}", updated_at
+
+
+def conditional_response(view_method):
+    """
+    Decorator cho action đọc của ViewSet
+
+    Gọi `self.get_version()` để lấy (token, last_modified); nếu khớp với
+    If-None-Match / If-Modified-Since của request thì trả 304 mà không chạy view,
+    ngược lại gắn header ETag (và Last-Modified nếu có) vào response 200.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_method(self, request, *args, **kwargs)
+
+        token, last_modified = self.get_version()
+        if token is None:
+            return view_method(self, request, *args, **kwargs)
+
+        # ETag phụ thuộc cả query string (page, cursor, ...) vì body khác nhau
+        etag = quote_etag(hashlib.md5(
+            f"{self.action}:{request.get_full_path()}:{token}".encode()
+        ).hexdigest())
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return wrapper
@@ -0,0 +1,166 @@
+"""
+Hàng đợi xóa object trên MinIO
+
+Request path chỉ ghi tên object vào PendingObjectDeletion; việc xóa thật
+được thực hiện theo batch (multi-object delete) bởi background thread
+hoặc lệnh `manage.py drain_image_deletions`.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PendingObjectDeletion, StoredImage
+from .services import minio_service
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_drain_lock = threading.Lock()
+_drain_scheduled = False
+
+# Chu kỳ (giây) chờ drainer xóa xong object đang được dùng lại
+CANCEL_POLL_INTERVAL = 0.05
+
+
+def enqueue_object_deletions(object_names) -> None:
+    """
+    Đưa object vào hàng đợi xóa
+
+    Drain được lên lịch sau khi transaction hiện tại commit (nếu bật
+    PRODUCT_IMAGE_DELETE_AUTO_DRAIN), nên rollback sẽ không xóa nhầm object.
+    """
+    object_names = [name for name in object_names if name]
+    if not object_names:
+        return
+    PendingObjectDeletion.objects.bulk_create(
+        [PendingObjectDeletion(object_name=name) for name in object_names],
+        ignore_conflicts=True
+    )
+    if settings.PRODUCT_IMAGE_DELETE_AUTO_DRAIN:
+        transaction.on_commit(schedule_drain)
+
+
+def cancel_object_deletions(object_name: str) -> None:
+    """
+    Hủy các lệnh xóa đang chờ của object (và derivative của nó)
+
+    Gọi khi object được dùng lại. Lệnh đang được một drainer xóa (còn lease)
+    không hủy được: hàm chờ drainer xóa xong hoặc lease hết hạn, khi đó object
+    đã bị xóa thật và người gọi sẽ upload lại.
+    """
+    base_name = object_name.rsplit('.', 1)[0]
+    pending = PendingObjectDeletion.objects.filter(
+        Q(object_name=object_name) | Q(object_name__startswith=f"{base_name}_")
+    )
+    while True:
+        pending.filter(Q(leased_until__isnull=True) | Q(leased_until__lte=timezone.now())).delete()
+        if not pending.exists():
+            return
+        time.sleep(CANCEL_POLL_INTERVAL)
+
+
+def claim_deletions(batch_size: int, after_id: int = 0) -> list:
+    """
+    Lease một batch object chờ xóa trong một transaction ngắn
+
+    Các row được khóa với SKIP LOCKED rồi gán `leased_until`, nên drainer khác
+    không lấy lại batch trong lúc đang xóa. Nếu drainer chết giữa chừng, object
+    được xóa lại khi lease hết hạn.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            PendingObjectDeletion.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(leased_until__isnull=True) | Q(leased_until__lte=now), id__gt=after_id)
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            PendingObjectDeletion.objects.filter(id__in=[item.id for item in batch]).update(
+                leased_until=now + timedelta(seconds=settings.PRODUCT_IMAGE_DELETE_LEASE_SECONDS)
+            )
+    return batch
+
+
+def drain_object_deletions(batch_size: int = None) -> dict:
+    """
+    Xóa các object đang chờ theo batch
+
+    Mỗi batch gồm ba bước: lease row (transaction ngắn), multi-object delete trên
+    MinIO ngoài transaction (không giữ lock/connection trong lúc chờ MinIO), ghi kết
+    quả (transaction ngắn). Nhiều drainer có thể chạy song song. Object xóa lỗi được
+    giữ lại (tăng attempts, bỏ lease) để lần drain sau thử lại.
+
+    Returns:
+        {"deleted": số object đã xóa, "failed": số object lỗi}
+    """
+    batch_size = batch_size or settings.PRODUCT_IMAGE_DELETE_BATCH_SIZE
+    deleted = failed = 0
+    last_id = 0
+    while True:
+        batch = claim_deletions(batch_size, last_id)
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        # Object đã được dùng lại (có StoredImage) thì bỏ lệnh xóa
+        reused = set(
+            StoredImage.objects
+            .filter(object_name__in=[item.object_name for item in batch])
+            .values_list('object_name', flat=True)
+        )
+        if reused:
+            PendingObjectDeletion.objects.filter(id__in=[
+                item.id for item in batch if item.object_name in reused
+            ]).delete()
+            batch = [item for item in batch if item.object_name not in reused]
+
+        errors = minio_service.delete_objects([item.object_name for item in batch])
+        done_ids = [item.id for item in batch if item.object_name not in errors]
+
+        with transaction.atomic():
+            PendingObjectDeletion.objects.filter(id__in=done_ids).delete()
+            for item in batch:
+                if item.object_name in errors:
+                    PendingObjectDeletion.objects.filter(id=item.id).update(
+                        attempts=F('attempts') + 1,
+                        last_error=errors[item.object_name],
+                        leased_until=None
+                    )
+
+        deleted += len(done_ids)
+        failed += len(errors)
+    return {'deleted': deleted, 'failed': failed}
+
+
+def schedule_drain() -> None:
+    """Lên lịch một lần drain ở background thread (gộp nhiều lần gọi liên tiếp)"""
+    global _executor, _drain_scheduled
+    with _drain_lock:
+        if _drain_scheduled:
+            return
+        _drain_scheduled = True
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-delete')
+    _executor.submit(_run_scheduled_drain)
+
+
+def _run_scheduled_drain() -> None:
+    global _drain_scheduled
+    with _drain_lock:
+        # Reset trước khi chạy: object được enqueue trong lúc drain sẽ có lượt drain tiếp theo
+        _drain_scheduled = False
+    close_old_connections()
+    try:
+        drain_object_deletions()
+    except Exception:
+        logger.exception("Draining pending object deletions failed")
+    finally:
+        close_old_connections()
@@ -0,0 +1,115 @@
+"""
+Streaming export cho Product (NDJSON / CSV)
+"""
+import csv
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+_DONE = object()
+_JSON_ENCODER = DjangoJSONEncoder()
+
+
+class Echo:
+    """Pseudo-buffer cho csv.writer: trả về luôn dòng vừa ghi thay vì lưu lại"""
+
+    def write(self, value):
+        return value
+
+
+def _batched(lines, batch_size):
+    """Gom nhiều dòng thành một chunk để giảm số lần ghi xuống socket"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def iter_ndjson(rows, fields, batch_size: int = 500):
+    """
+    Sinh NDJSON từ các tuple (values_list)
+
+    Args:
+        rows: Iterable các tuple theo thứ tự `fields`
+        fields: Tên các cột
+        batch_size: Số dòng mỗi chunk
+    """
+    lines = (
+        json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder,
+                   ensure_ascii=False, separators=(',', ':')) + '\n'
+        for row in rows
+    )
+    return _batched(lines, batch_size)
+
+
+def iter_csv(rows, fields, batch_size: int = 500):
+    """
+    Sinh CSV (có header) từ các tuple (values_list)
+
+    Args:
+        rows: Iterable các tuple theo thứ tự `fields`
+        fields: Tên các cột
+        batch_size: Số dòng mỗi chunk
+    """
+    writer = csv.writer(Echo())
+    # Header được gửi ngay để client nhận byte đầu tiên sớm nhất
+    yield writer.writerow(fields)
+    yield from _batched((writer.writerow(_csv_row(row)) for row in rows), batch_size)
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, cls=DjangoJSONEncoder)
+    if isinstance(value, (datetime.date, datetime.time)):
+        # ISO 8601 giống hệt NDJSON (DjangoJSONEncoder), không dùng str() ("2026-10-18 00:25:55+00:00")
+        return _JSON_ENCODER.default(value)
+    return value
+
+
+def _csv_row(row):
+    """
+    Cột JSON (dict/list) được ghi dưới dạng chuỗi JSON thay vì repr của Python,
+    ngày giờ theo ISO 8601 như NDJSON
+    """
+    return [_csv_value(value) for value in row]
+
+
+async def _aiter_in_thread(iterator):
+    """
+    Async iterator lấy từng chunk của iterator sync trong thread (sync_to_async)
+
+    Các chunk cùng chạy trên thread của request (thread_sensitive) nên server-side
+    cursor của Postgres vẫn dùng đúng một connection.
+    """
+    iterator = iter(iterator)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(iterator, _DONE)
+        if chunk is _DONE:
+            break
+        yield chunk
+
+
+def streaming_response(request, content, **kwargs) -> StreamingHttpResponse:
+    """
+    StreamingHttpResponse stream được cả dưới WSGI và ASGI
+
+    Dưới ASGI, Django gom toàn bộ iterator sync vào một list (`sync_to_async(list)`)
+    trước khi gửi byte đầu tiên, nên iterator được chuyển thành async iterator
+    để bộ nhớ không tăng theo kích thước response.
+
+    Args:
+        request: Request của view (DRF Request hoặc HttpRequest)
+        content: Iterator sync sinh ra các chunk
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = _aiter_in_thread(content)
+    return StreamingHttpResponse(content, **kwargs)
@@ -0,0 +1,152 @@
+"""
+Filter backend cho Product API
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Full-text search `?q=` trên name + description
+
+    Trên Postgres dùng cột `search_vector` (GIN index, trigger cập nhật), mỗi từ khóa
+    được match theo prefix (`iph` khớp `iphone`) và kết quả sắp xếp theo rank.
+    DB khác (SQLite khi dev) fallback về `icontains`.
+    """
+    search_param = 'q'
+
+    @classmethod
+    def get_search_terms(cls, request) -> list:
+        """Tách từ khóa; chỉ giữ ký tự chữ/số nên an toàn khi ghép vào tsquery"""
+        return re.findall(r'[^\W_]+', request.query_params.get(cls.search_param, ''))
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return bool(cls.get_search_terms(request))
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        if connection.vendor != 'postgresql':
+            for term in terms:
+                queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+            return queryset.order_by('id')
+
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config='simple'
+        )
+        return (
+            queryset
+            .filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', 'id')
+        )
+
+
+def _parse_int(value):
+    return int(value)
+
+
+def _parse_bool(value):
+    value = value.lower()
+    if value in ('true', '1'):
+        return True
+    if value in ('false', '0'):
+        return False
+    raise ValueError(value)
+
+
+class ProductFilter(BaseFilterBackend):
+    """
+    Filter khai báo cho danh sách sản phẩm
+
+    Mỗi query param map sang một lookup ORM; các field lọc đều có index
+    (xem Product.Meta.indexes) nên query không phải quét toàn bảng.
+    """
+    # query param -> (parser, lookup)
+    filters = {
+        'price_min': (_parse_int, 'price__gte'),
+        'price_max': (_parse_int, 'price__lte'),
+        'id_min': (_parse_int, 'id__gte'),
+        'id_max': (_parse_int, 'id__lte'),
+        'status': (_parse_bool, 'status'),
+    }
+    # query param -> field rỗng ('') nghĩa là "chưa có"
+    presence_filters = {
+        'has_image': 'image',
+        'has_post_id': 'post_id',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        errors = {}
+        for param, (parser, lookup) in self.filters.items():
+            value = request.query_params.get(param)
+            if value is None or value == '':
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: parser(value)})
+            except ValueError:
+                errors[param] = f"Giá trị không hợp lệ: {value}"
+
+        for param, field in self.presence_filters.items():
+            value = request.query_params.get(param)
+            if value is None or value == '':
+                continue
+            try:
+                present = _parse_bool(value)
+            except ValueError:
+                errors[param] = f"Giá trị không hợp lệ: {value}"
+                continue
+            if present:
+                queryset = queryset.exclude(**{field: ''})
+            else:
+                queryset = queryset.filter(**{field: ''})
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        return queryset
+
+
+class ProductOrderingFilter(OrderingFilter):
+    """
+    `?ordering=price,-id`, chỉ cho phép sort theo field có index
+
+    Field không có index bị từ chối (400) thay vì bị bỏ qua, để client biết
+    và không vô tình gây full table sort. Luôn thêm `id` làm tie-breaker để
+    thứ tự ổn định giữa các trang.
+    """
+    ordering_fields = ['id', 'price', 'updated_at']
+
+    def get_default_ordering(self, view):
+        return ['id']
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        fields = [field for field in fields if field]
+        invalid = [field for field in fields if field.lstrip('-') not in self.ordering_fields]
+        if invalid:
+            raise serializers.ValidationError({
+                self.ordering_param: f"Không thể sắp xếp theo: {', '.join(invalid)}. "
+                                     f"Chỉ chấp nhận: {', '.join(self.ordering_fields)}"
+            })
+        return fields
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering.append('id')
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        # Không gửi `ordering` thì giữ nguyên thứ tự hiện có (vd: rank của search)
+        if not request.query_params.get(self.ordering_param):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,303 @@
+"""
+Nghiệp vụ ảnh sản phẩm dùng chung cho API và background worker
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+from .deletions import cancel_object_deletions, enqueue_object_deletions
+from .imaging import render_variant, supported_formats
+from .models import OutboxEvent, Product, StoredImage
+from .outbox import enqueue_event, product_payload
+from .serializers import IMAGE_CONTENT_TYPES
+from .services import StoredObject, minio_service
+from .uploads import IMAGE_HEADER_LENGTH, identify_image_header
+
+logger = logging.getLogger(__name__)
+
+PRESIGNED_UPLOAD_SALT = 'products.presigned-upload'
+
+VARIANT_CONTENT_TYPES = {
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool cho Pillow (resize/encode tốn CPU, không bị giới hạn bởi GIL)
+
+    Dùng spawn thay vì fork vì process Django có thể đang chạy nhiều thread.
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=settings.PRODUCT_IMAGE_VARIANT_PROCESSES,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Bỏ pool bị hỏng (process con chết) để lần sau tạo pool mới"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_image_variants(data: bytes, object_name: str) -> dict:
+    """
+    Sinh các ảnh derivative và upload cạnh ảnh gốc trong bucket
+
+    Args:
+        data: Nội dung ảnh gốc
+        object_name: Tên object của ảnh gốc (VD: "uuid.jpg")
+
+    Returns:
+        Variant map {"200": {"webp": "<url>"}, ...}; rỗng nếu không sinh được
+    """
+    formats = supported_formats(settings.PRODUCT_IMAGE_VARIANT_FORMATS)
+    base_name = os.path.splitext(object_name)[0]
+    pool = get_process_pool()
+    try:
+        futures = {
+            (width, image_format): pool.submit(
+                render_variant, data, width, image_format,
+                settings.PRODUCT_IMAGE_VARIANT_QUALITY
+            )
+            for width in settings.PRODUCT_IMAGE_VARIANT_WIDTHS
+            for image_format in formats
+        }
+    except BrokenProcessPool:
+        logger.exception("Image process pool is broken, skipping variants of %s", object_name)
+        _discard_process_pool(pool)
+        return {}
+
+    # Ảnh derivative là phần phụ: lỗi ở đây không được làm hỏng upload ảnh gốc
+    variants = {}
+    for (width, image_format), future in futures.items():
+        try:
+            variant_data = future.result()
+        except BrokenProcessPool:
+            logger.exception("Image process pool is broken, skipping variants of %s", object_name)
+            _discard_process_pool(pool)
+            break
+        except Exception:
+            logger.exception("Cannot render %spx %s variant of %s", width, image_format, object_name)
+            continue
+        url = minio_service.upload_bytes(
+            f"{base_name}_{width}.{image_format}",
+            variant_data,
+            VARIANT_CONTENT_TYPES[image_format]
+        )
+        if url:
+            variants.setdefault(str(width), {})[image_format] = url
+    return variants
+
+
+def iter_variant_urls(variants: dict):
+    """Duyệt toàn bộ URL trong variant map"""
+    for formats in (variants or {}).values():
+        yield from formats.values()
+
+
+def _delete_objects(image_url: str, variants: dict) -> None:
+    """Đưa ảnh gốc và các derivative vào hàng đợi xóa trên MinIO"""
+    enqueue_object_deletions(
+        [minio_service.get_object_name(image_url)]
+        + [minio_service.get_object_name(url) for url in iter_variant_urls(variants)]
+    )
+
+
+def acquire_stored_image(object_name: str, digest: str = '', size: int = 0) -> StoredImage:
+    """
+    Tăng ref_count của object (tạo bản ghi nếu chưa có)
+
+    Phải gọi trước khi put_object: khi ref_count > 0, release song song
+    sẽ không xóa object đang được dùng lại.
+    """
+    with transaction.atomic():
+        cancel_object_deletions(object_name)
+        stored_image, _ = StoredImage.objects.select_for_update().get_or_create(
+            object_name=object_name,
+            defaults={'digest': digest, 'size': size}
+        )
+        stored_image.ref_count = F('ref_count') + 1
+        stored_image.save(update_fields=['ref_count'])
+    stored_image.refresh_from_db()
+    return stored_image
+
+
+def release_image(image_url: str, variants: Optional[dict] = None) -> None:
+    """
+    Bỏ một tham chiếu tới ảnh, xóa object (và derivative) khi không còn product nào dùng
+
+    Args:
+        image_url: URL ảnh
+        variants: Variant map của product (chỉ dùng cho ảnh cũ chưa có StoredImage)
+    """
+    if not image_url:
+        return
+
+    object_name = minio_service.get_object_name(image_url)
+    with transaction.atomic():
+        stored_image = StoredImage.objects.select_for_update().filter(object_name=object_name).first()
+        if stored_image is None:
+            # Ảnh upload trước khi có content addressing: chỉ một product dùng
+            _delete_objects(image_url, variants)
+            return
+
+        if stored_image.ref_count > 1:
+            stored_image.ref_count -= 1
+            stored_image.save(update_fields=['ref_count'])
+            return
+
+        # Object vào hàng đợi xóa; acquire sau đó sẽ hủy lệnh xóa (hoặc chờ drain
+        # xóa xong rồi upload lại) thay vì trỏ tới object bị xóa
+        stored_image.delete()
+        _delete_objects(image_url, stored_image.variants)
+
+
+def attach_product_image(product: Product, image_url: str, variants: Optional[dict] = None) -> None:
+    """
+    Gắn URL ảnh mới (và derivative) vào product, bỏ tham chiếu tới ảnh cũ
+
+    Ảnh mới phải được acquire_stored_image trước khi gọi hàm này.
+
+    Args:
+        product: Product cần cập nhật ảnh
+        image_url: URL ảnh đã có trên MinIO
+        variants: Variant map của ảnh mới
+    """
+    old_image, old_variants = product.image, product.image_variants
+    product.image = image_url
+    product.image_variants = variants or {}
+    with transaction.atomic():
+        product.save(update_fields=['image', 'image_variants', 'updated_at'])
+        enqueue_event(OutboxEvent.TYPE_PRODUCT_IMAGE_UPDATED, product_payload(product))
+
+    # Chỉ release ảnh cũ sau khi DB đã trỏ sang ảnh mới. Nếu ảnh cũ trùng ảnh mới
+    # thì release này trả lại đúng tham chiếu vừa acquire.
+    release_image(old_image, old_variants)
+
+
+def replace_product_image(product: Product, image_file) -> Optional[StoredObject]:
+    """
+    Upload ảnh mới lên MinIO, gắn vào product và bỏ tham chiếu tới ảnh cũ
+
+    Ảnh trùng nội dung với object đã có sẽ không được upload lại,
+    derivative của object đó cũng được dùng lại.
+
+    Args:
+        product: Product cần cập nhật ảnh
+        image_file: File ảnh (đã được validate)
+
+    Returns:
+        StoredObject (created=False nếu được dedup) hoặc None nếu upload lên MinIO thất bại
+    """
+    digest = minio_service.hash_file(image_file)
+    object_name = minio_service.build_content_object_name(digest, image_file.name)
+    stored_image = acquire_stored_image(object_name, digest, image_file.size)
+
+    stored = minio_service.store_image(image_file, object_name)
+    if stored is None:
+        release_image(minio_service.get_public_url(object_name))
+        return None
+
+    variants = stored_image.variants
+    if stored.created or not variants:
+        image_file.seek(0)
+        variants = generate_image_variants(image_file.read(), object_name)
+        StoredImage.objects.filter(pk=stored_image.pk).update(variants=variants)
+
+    attach_product_image(product, stored.url, variants)
+    return stored
+
+
+def check_uploaded_image(object_name: str) -> bool:
+    """
+    Kiểm tra object client upload thẳng lên MinIO có thật là ảnh khớp với đuôi file
+
+    Content-Type của object do client gửi nên không đáng tin: chỉ đọc
+    IMAGE_HEADER_LENGTH byte đầu (không tải cả object) cho magic bytes và Pillow.
+    """
+    header = minio_service.read_object_head(object_name, IMAGE_HEADER_LENGTH)
+    image_format = identify_image_header(header) if header else None
+    extension = os.path.splitext(object_name)[1].lower()
+    return image_format is not None and IMAGE_CONTENT_TYPES.get(extension) == f'image/{image_format}'
+
+
+def attach_uploaded_object(product: Product, object_name: str, size: int) -> str:
+    """
+    Gắn object đã được client upload thẳng lên MinIO (presigned POST) vào product
+
+    Returns:
+        URL ảnh
+    """
+    stored_image = acquire_stored_image(object_name, size=size)
+
+    variants = stored_image.variants
+    if not variants:
+        data = minio_service.get_object_bytes(object_name)
+        if data is not None:
+            variants = generate_image_variants(data, object_name)
+            StoredImage.objects.filter(pk=stored_image.pk).update(variants=variants)
+
+    image_url = minio_service.get_public_url(object_name)
+    attach_product_image(product, image_url, variants)
+    return image_url
+
+
+def storage_stats() -> dict:
+    """Thống kê dung lượng ảnh: dung lượng thực lưu và dung lượng tiết kiệm nhờ dedup"""
+    stats = StoredImage.objects.aggregate(
+        objects=Count('id'),
+        stored_bytes=Coalesce(Sum('size'), 0),
+        referenced_bytes=Coalesce(Sum(F('size') * F('ref_count')), 0)
+    )
+    stats['bytes_saved'] = stats['referenced_bytes'] - stats['stored_bytes']
+    return stats
+
+
+def create_upload_token(product: Product, object_name: str) -> str:
+    """Token ký bằng SECRET_KEY, gắn object được phép upload với product"""
+    return signing.dumps(
+        {'product': product.id, 'object': object_name},
+        salt=PRESIGNED_UPLOAD_SALT
+    )
+
+
+def read_upload_token(product: Product, token: str) -> str:
+    """
+    Giải mã upload token và trả về tên object
+
+    Raises:
+        signing.BadSignature: Token sai, hết hạn hoặc không thuộc product này
+    """
+    payload = signing.loads(
+        token,
+        salt=PRESIGNED_UPLOAD_SALT,
+        max_age=settings.MINIO_PRESIGNED_UPLOAD_EXPIRY * 2
+    )
+    if payload.get('product') != product.id:
+        raise signing.BadSignature('Upload token không thuộc sản phẩm này')
+    return payload['object']
@@ -0,0 +1,51 @@
+"""
+Xử lý ảnh bằng Pillow (chạy trong process pool)
+
+Module này cố ý không import Django để process con khởi động nhanh.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# Pillow dùng tên format viết hoa
+_PILLOW_FORMATS = {
+    'webp': 'WEBP',
+    'avif': 'AVIF',
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+}
+
+
+def supported_formats(formats):
+    """Lọc các format mà bản Pillow hiện tại ghi được (VD: AVIF cần plugin)"""
+    Image.init()
+    return [fmt for fmt in formats if _PILLOW_FORMATS.get(fmt) in Image.SAVE]
+
+
+def render_variant(data: bytes, width: int, image_format: str, quality: int = 80) -> bytes:
+    """
+    Resize ảnh về chiều rộng tối đa `width` (giữ tỉ lệ) và encode sang `image_format`
+
+    Args:
+        data: Nội dung ảnh gốc
+        width: Chiều rộng tối đa (px)
+        image_format: Format đích (webp, avif, jpeg, png)
+        quality: Chất lượng nén
+
+    Returns:
+        Nội dung ảnh đã encode
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        pillow_format = _PILLOW_FORMATS[image_format]
+        if pillow_format == 'JPEG' and image.mode == 'RGBA':
+            image = image.convert('RGB')
+        image.save(output, format=pillow_format, quality=quality)
+        return output.getvalue()
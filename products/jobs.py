@@ -0,0 +1,197 @@
+"""
+Background worker pool cho các job upload ảnh bất đồng bộ
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.uploadedfile import UploadedFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .images import replace_product_image
+from .models import ImageUploadJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Tạo worker pool lần đầu được dùng (không tạo thread khi chạy manage.py)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PRODUCT_UPLOAD_WORKERS,
+                    thread_name_prefix='image-upload'
+                )
+    return _executor
+
+
+def _spool_to_job_dir(image_file) -> str:
+    """
+    Lưu file upload ra thư mục job để worker đọc sau khi request kết thúc
+
+    Nếu Django đã ghi file ra temp file thì chỉ move, không copy lại dữ liệu.
+    """
+    os.makedirs(settings.PRODUCT_UPLOAD_JOB_DIR, exist_ok=True)
+    extension = os.path.splitext(image_file.name)[1]
+    fd, path = tempfile.mkstemp(suffix=extension, dir=settings.PRODUCT_UPLOAD_JOB_DIR)
+
+    if hasattr(image_file, 'temporary_file_path'):
+        os.close(fd)
+        file_move_safe(image_file.temporary_file_path(), path, allow_overwrite=True)
+    else:
+        with os.fdopen(fd, 'wb') as destination:
+            image_file.seek(0)
+            shutil.copyfileobj(image_file, destination)
+    return path
+
+
+def enqueue_image_upload(product, image_file) -> ImageUploadJob:
+    """
+    Tạo job upload ảnh và đẩy vào worker pool
+
+    Args:
+        product: Product cần cập nhật ảnh
+        image_file: File ảnh đã được validate
+
+    Returns:
+        ImageUploadJob vừa tạo (status = pending)
+    """
+    path = _spool_to_job_dir(image_file)
+    job = ImageUploadJob.objects.create(
+        product=product,
+        file_path=path,
+        file_name=image_file.name,
+        content_type=image_file.content_type or 'application/octet-stream',
+        file_size=image_file.size
+    )
+    # Chỉ submit khi job đã được commit để worker chắc chắn đọc được
+    transaction.on_commit(lambda: get_executor().submit(process_image_upload_job, job.id))
+    return job
+
+
+def process_image_upload_job(job_id) -> None:
+    """Worker: upload file của job lên MinIO và cập nhật ảnh cho product"""
+    close_old_connections()
+    try:
+        # Claim job (pending -> processing) để job không bị xử lý hai lần khi được recover song song
+        claimed = ImageUploadJob.objects.filter(id=job_id, status=ImageUploadJob.STATUS_PENDING).update(
+            status=ImageUploadJob.STATUS_PROCESSING,
+            started_at=timezone.now()
+        )
+        if claimed:
+            _run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def _run_job(job_id) -> None:
+    """Xử lý job đã được claim (status = processing)"""
+    job = None
+    try:
+        job = ImageUploadJob.objects.select_related('product').get(id=job_id)
+
+        with open(job.file_path, 'rb') as fh:
+            image_file = UploadedFile(
+                file=fh,
+                name=job.file_name,
+                content_type=job.content_type,
+                size=job.file_size
+            )
+            stored = replace_product_image(job.product, image_file)
+
+        if stored:
+            job.status = ImageUploadJob.STATUS_SUCCEEDED
+            job.image = stored.url
+        else:
+            job.status = ImageUploadJob.STATUS_FAILED
+            job.error = 'Không thể upload ảnh lên MinIO'
+    except FileNotFoundError:
+        logger.warning("Image upload job %s lost its spooled file", job_id)
+        job.status = ImageUploadJob.STATUS_FAILED
+        job.error = 'File tạm của job không còn (server đã restart), vui lòng upload lại'
+    except Exception as e:
+        logger.exception("Image upload job %s failed", job_id)
+        if job is None:
+            return
+        job.status = ImageUploadJob.STATUS_FAILED
+        job.error = str(e)
+    finally:
+        if job is not None:
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'image', 'error', 'finished_at'])
+            try:
+                os.remove(job.file_path)
+            except FileNotFoundError:
+                pass
+
+
+def stale_jobs(stale_seconds: int):
+    """
+    Job bị bỏ dở: pending/processing lâu hơn `stale_seconds` giây
+
+    Worker pool nằm trong process của web server nên job đang chờ hoặc đang chạy
+    sẽ bị mất khi process restart/bị recycle, row trong DB thì vẫn còn.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    return ImageUploadJob.objects.filter(
+        Q(status=ImageUploadJob.STATUS_PENDING, created_at__lte=cutoff)
+        | Q(status=ImageUploadJob.STATUS_PROCESSING, started_at__lte=cutoff)
+        | Q(status=ImageUploadJob.STATUS_PROCESSING, started_at__isnull=True, created_at__lte=cutoff)
+    )
+
+
+def recover_stale_jobs(stale_seconds: int = None, retry: bool = True) -> dict:
+    """
+    Xử lý lại (hoặc đánh dấu failed) các job bị bỏ dở, chạy ngay trong process hiện tại
+
+    Args:
+        stale_seconds: Tuổi tối thiểu của job (mặc định PRODUCT_UPLOAD_JOB_STALE_SECONDS)
+        retry: False thì chỉ đánh dấu failed, không upload lại
+
+    Returns:
+        {"retried": số job chạy lại thành công, "failed": số job kết thúc ở trạng thái failed}
+        (đếm theo status cuối cùng của job, kể cả job chạy lại nhưng thất bại)
+    """
+    if stale_seconds is None:
+        stale_seconds = settings.PRODUCT_UPLOAD_JOB_STALE_SECONDS
+    retried = failed = 0
+    for job_id in list(stale_jobs(stale_seconds).values_list('id', flat=True)):
+        # Claim lại job (cùng điều kiện stale) để hai process recover không chạy trùng
+        claimed = stale_jobs(stale_seconds).filter(id=job_id).update(
+            status=ImageUploadJob.STATUS_PROCESSING,
+            started_at=timezone.now()
+        )
+        if not claimed:
+            continue
+        if retry:
+            _run_job(job_id)
+            status = ImageUploadJob.objects.filter(id=job_id).values_list('status', flat=True).first()
+            if status == ImageUploadJob.STATUS_SUCCEEDED:
+                retried += 1
+            else:
+                failed += 1
+            continue
+        job = ImageUploadJob.objects.get(id=job_id)
+        job.status = ImageUploadJob.STATUS_FAILED
+        job.error = 'Job bị gián đoạn (server đã restart), vui lòng upload lại'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        try:
+            os.remove(job.file_path)
+        except FileNotFoundError:
+            pass
+        failed += 1
+    return {'retried': retried, 'failed': failed}
@@ -0,0 +1,118 @@
+import json
+import platform
+import subprocess
+import sys
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from products.benchmarks.runner import BenchmarkRunner
+from products.services import minio_service
+from products.tests.fake_minio import FakeMinioClient
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark các endpoint Product (list/pending/retrieve/create/bulk/upload) trên "
+        "database test riêng với MinIO giả lập in-process; in p50/p95/p99, req/s, số query "
+        "và ghi kết quả JSON để so sánh giữa các release"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000',
+                            help='Số product cần seed, cách nhau bởi dấu phẩy')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Số request đo cho mỗi kịch bản')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Số request chạy trước khi đo (không tính)')
+        parser.add_argument('--scenarios', default='',
+                            help='Chỉ chạy các kịch bản này, cách nhau bởi dấu phẩy (VD: list_page,retrieve)')
+        parser.add_argument('--cache', choices=['off', 'on', 'both'], default='off',
+                            help='Response cache khi đo: off (mặc định, đo đường xử lý thật), on, '
+                                 'hoặc both (đo cả hai, kết quả tách riêng theo cột cache)')
+        parser.add_argument('--minio-latency-ms', type=float, default=0,
+                            help='Độ trễ giả lập cho mỗi lời gọi MinIO')
+        parser.add_argument('--output', default='benchmark_results.json',
+                            help='File JSON kết quả')
+        parser.add_argument('--compare', default='',
+                            help='File JSON của lần chạy trước để so sánh')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Giữ lại database test (seed lại nhanh hơn ở lần sau)')
+
+    def _git_revision(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                stderr=subprocess.DEVNULL, text=True
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    def _compare(self, results, baseline_path):
+        """In chênh lệch p50 và req/s so với baseline (theo scenario + rows + cache)"""
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = {
+                (item['scenario'], item['rows'], item.get('cache', False)): item
+                for item in json.load(f)['results']
+            }
+        self.stdout.write(f"Compared with {baseline_path}:")
+        for item in results:
+            before = baseline.get((item['scenario'], item['rows'], item['cache']))
+            if not before or not before['p50_ms'] or not before['rps']:
+                continue
+            p50_change = (item['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            rps_change = (item['rps'] - before['rps']) / before['rps'] * 100
+            scenario = item['scenario'] + (' [cache]' if item['cache'] else '')
+            self.stdout.write(
+                f"  {scenario:<30} rows={item['rows']:<8} "
+                f"p50 {p50_change:+7.1f}%  rps {rps_change:+7.1f}%"
+            )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes phải là danh sách số nguyên')
+        if not sizes or min(sizes) < 1:
+            raise CommandError('--sizes phải lớn hơn 0')
+        only = {name.strip() for name in options['scenarios'].split(',') if name.strip()}
+        cache_modes = {'off': (False,), 'on': (True,), 'both': (False, True)}[options['cache']]
+
+        # Không bao giờ chạy trên database thật: tạo database test riêng
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        minio_service.client = FakeMinioClient(latency=options['minio_latency_ms'] / 1000)
+        try:
+            runner = BenchmarkRunner(options['requests'], options['warmup'], stdout=self.stdout)
+            results = runner.run(sizes, only=only, cache_modes=cache_modes)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'revision': self._git_revision(),
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'database': connection.vendor,
+                'settings': settings.SETTINGS_MODULE,
+                'cache': options['cache'],
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'minio_latency_ms': options['minio_latency_ms'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Wrote {len(results)} result(s) to {options['output']}")
+
+        if options['compare']:
+            self._compare(results, options['compare'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = "Compact change log của Product: chỉ giữ change mới nhất của mỗi product"
+
+    def handle(self, *args, **options):
+        deleted = compact_changes()
+        self.stdout.write(f"Removed {deleted} superseded change(s)")
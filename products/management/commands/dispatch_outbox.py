@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.outbox import dead_events, dispatch_outbox, purge_dead_events, requeue_dead_events
+
+
+class Command(BaseCommand):
+    help = "Gửi các event thay đổi Product đang chờ trong outbox tới webhook (theo batch, có retry)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Số event mỗi batch (mặc định PRODUCT_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Chạy liên tục, dispatch mỗi --interval giây')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Khoảng nghỉ giữa các lần dispatch khi dùng --loop (giây)')
+        dead = parser.add_mutually_exclusive_group()
+        dead.add_argument('--requeue-dead', action='store_true',
+                          help='Đưa event đã hết số lần retry vào hàng đợi lại (VD: sau khi sửa webhook) trước khi dispatch')
+        dead.add_argument('--purge-dead', action='store_true',
+                          help='Xóa event đã hết số lần retry')
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            self.stdout.write(f"Requeued {requeue_dead_events()} dead event(s)")
+        if options['purge_dead']:
+            self.stdout.write(f"Purged {purge_dead_events()} dead event(s)")
+
+        while True:
+            result = dispatch_outbox(options['batch_size'])
+            if result['sent'] or result['failed'] or not options['loop']:
+                self.stdout.write(
+                    f"Sent {result['sent']} event(s), {result['failed']} failed, "
+                    f"{dead_events().count()} dead"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.deletions import drain_object_deletions
+
+
+class Command(BaseCommand):
+    help = "Xóa các object ảnh đang chờ trong hàng đợi (multi-object delete theo batch)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Số object mỗi batch (mặc định PRODUCT_IMAGE_DELETE_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Chạy liên tục, drain mỗi --interval giây')
+        parser.add_argument('--interval', type=float, default=30,
+                            help='Khoảng nghỉ giữa các lần drain khi dùng --loop (giây)')
+
+    def handle(self, *args, **options):
+        while True:
+            result = drain_object_deletions(options['batch_size'])
+            self.stdout.write(
+                f"Deleted {result['deleted']} object(s), {result['failed']} failed"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
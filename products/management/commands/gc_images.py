@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.deletions import drain_object_deletions, enqueue_object_deletions
+from products.images import iter_variant_urls
+from products.models import Product, StoredImage
+from products.services import minio_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Tìm ảnh mồ côi trên MinIO (không còn product nào tham chiếu) "
+        "bằng cách đối chiếu listing của bucket với Product.image, sau đó xóa theo batch"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Chỉ thống kê, không xóa')
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help='Bỏ qua object mới hơn N giờ (VD: presigned upload chưa complete)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Số object mỗi lần đưa vào hàng đợi xóa')
+
+    def _referenced_object_names(self) -> set:
+        """Tên các object đang được tham chiếu (ảnh gốc và derivative)"""
+        referenced = set()
+        rows = Product.objects.values_list('image', 'image_variants').iterator(chunk_size=2000)
+        for image, variants in rows:
+            if image:
+                referenced.add(minio_service.get_object_name(image))
+            for url in iter_variant_urls(variants):
+                referenced.add(minio_service.get_object_name(url))
+
+        rows = StoredImage.objects.values_list('object_name', 'variants').iterator(chunk_size=2000)
+        for object_name, variants in rows:
+            referenced.add(object_name)
+            for url in iter_variant_urls(variants):
+                referenced.add(minio_service.get_object_name(url))
+        return referenced
+
+    def handle(self, *args, **options):
+        referenced = self._referenced_object_names()
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+
+        orphan_count = orphan_bytes = 0
+        batch = []
+        # Listing được duyệt theo từng trang, không load toàn bộ bucket vào bộ nhớ
+        for obj in minio_service.iter_objects():
+            if obj.object_name in referenced:
+                continue
+            if obj.last_modified and obj.last_modified > cutoff:
+                continue
+
+            orphan_count += 1
+            orphan_bytes += obj.size or 0
+            if options['dry_run']:
+                self.stdout.write(obj.object_name)
+                continue
+
+            batch.append(obj.object_name)
+            if len(batch) >= options['batch_size']:
+                enqueue_object_deletions(batch)
+                batch = []
+
+        if batch:
+            enqueue_object_deletions(batch)
+
+        self.stdout.write(f"Found {orphan_count} orphaned object(s), {orphan_bytes} bytes")
+        if not options['dry_run']:
+            result = drain_object_deletions()
+            self.stdout.write(
+                f"Deleted {result['deleted']} object(s), {result['failed']} failed"
+            )
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.jobs import recover_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Xử lý lại các job upload ảnh bị bỏ dở (pending/processing) sau khi server restart"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-seconds', type=int, default=None,
+                            help='Tuổi tối thiểu của job (mặc định PRODUCT_UPLOAD_JOB_STALE_SECONDS); '
+                                 '0 khi chạy lúc khởi động và chỉ có một server')
+        parser.add_argument('--fail', action='store_true',
+                            help='Chỉ đánh dấu failed, không upload lại')
+        parser.add_argument('--loop', action='store_true',
+                            help='Chạy liên tục, kiểm tra mỗi --interval giây')
+        parser.add_argument('--interval', type=float, default=60,
+                            help='Khoảng nghỉ giữa các lần kiểm tra khi dùng --loop (giây)')
+
+    def handle(self, *args, **options):
+        while True:
+            result = recover_stale_jobs(options['stale_seconds'], retry=not options['fail'])
+            if result['retried'] or result['failed'] or not options['loop']:
+                self.stdout.write(
+                    f"Retried {result['retried']} job(s), {result['failed']} job(s) failed"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
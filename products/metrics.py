@@ -0,0 +1,350 @@
+"""
+Metrics hiệu năng cho Product API, xuất theo format text của Prometheus (GET /metrics/)
+
+Tự cài đặt Counter/Histogram tối giản (không phụ thuộc prometheus_client): mỗi lần
+ghi chỉ là một bisect và cộng số dưới lock. Khi chạy nhiều worker uvicorn
+(PRODUCT_METRICS_DIR khác rỗng), mỗi process định kỳ ghi snapshot bộ đếm của mình ra
+một file trong thư mục chung và /metrics/ cộng dồn snapshot của mọi process, giống
+multiprocess mode của prometheus_client.
+"""
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        self.registry = registry
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        if self.registry is not None:
+            self.registry.changed()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.values)
+
+    @staticmethod
+    def merge(values: dict, key, value) -> None:
+        values[key] = values.get(key, 0) + value
+
+    def render(self, values=None):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        values = self.snapshot() if values is None else values
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [số đếm từng bucket (không cộng dồn) + bucket +Inf, sum]
+        self.values = {}
+        self.lock = threading.Lock()
+        self.registry = registry
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+        if self.registry is not None:
+            self.registry.changed()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {key: [list(counts), total] for key, (counts, total) in self.values.items()}
+
+    def merge(self, values: dict, key, value) -> None:
+        counts, total = value
+        if len(counts) != len(self.buckets) + 1:
+            # Snapshot của phiên bản có bucket khác (process cũ trước khi deploy)
+            return
+        entry = values.get(key)
+        if entry is None:
+            values[key] = [list(counts), total]
+            return
+        entry[0] = [a + b for a, b in zip(entry[0], counts)]
+        entry[1] += total
+
+    def render(self, values=None):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        values = self.snapshot() if values is None else values
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+        self.dirty = False
+        # Process đã chạy thread flush (so với os.getpid() để xử lý fork)
+        self._flusher_pid = None
+        self._process_id = None
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, registry=self, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, registry=self, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def changed(self) -> None:
+        """Gọi sau mỗi lần ghi: đánh dấu cần flush, chạy thread flush lần đầu trong process"""
+        self.dirty = True
+        if self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        with self.lock:
+            pid = os.getpid()
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        if not settings.PRODUCT_METRICS_DIR:
+            return
+        threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(settings.PRODUCT_METRICS_FLUSH_INTERVAL)
+            if self.dirty:
+                self.flush()
+
+    def _get_process_id(self) -> str:
+        """
+        Tên file snapshot của process: pid kèm uuid để process khởi động lại với pid
+        cũ không ghi đè snapshot của process trước, đổi lại sau fork
+        """
+        pid = os.getpid()
+        if self._process_id is None or not self._process_id.startswith(f'{pid}-'):
+            self._process_id = f'{pid}-{uuid.uuid4().hex[:8]}'
+        return self._process_id
+
+    def flush(self) -> None:
+        """Ghi snapshot của process hiện tại vào PRODUCT_METRICS_DIR (ghi file tạm rồi rename)"""
+        directory = settings.PRODUCT_METRICS_DIR
+        if not directory:
+            return
+        self.dirty = False
+        data = {
+            metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+            for metric in self.metrics
+        }
+        path = os.path.join(directory, f'{self._get_process_id()}.json')
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(data, file)
+            os.replace(f'{path}.tmp', path)
+        except OSError:
+            logger.exception("Writing metrics snapshot %s failed", path)
+
+    def collect(self) -> dict:
+        """Giá trị của mọi metric: của process hiện tại, hoặc cộng dồn mọi snapshot trong PRODUCT_METRICS_DIR"""
+        directory = settings.PRODUCT_METRICS_DIR
+        if not directory:
+            return {metric.name: metric.snapshot() for metric in self.metrics}
+
+        self.flush()
+        collected = {metric.name: {} for metric in self.metrics}
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                # File của process vừa bị xóa hoặc đang ghi dở
+                continue
+            for metric in self.metrics:
+                values = collected[metric.name]
+                for key, value in data.get(metric.name, []):
+                    metric.merge(values, tuple(key), value)
+        return collected
+
+    def render(self) -> str:
+        collected = self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render(collected[metric.name]))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'product_api_request_duration_seconds', 'Thời gian xử lý request theo view',
+    ['view', 'method']
+)
+REQUESTS = REGISTRY.counter(
+    'product_api_requests_total', 'Số request theo view và status code',
+    ['view', 'method', 'status']
+)
+DB_QUERIES = REGISTRY.histogram(
+    'product_api_db_queries', 'Số query DB mỗi request',
+    ['view'], buckets=QUERY_COUNT_BUCKETS
+)
+DB_DURATION = REGISTRY.histogram(
+    'product_api_db_duration_seconds', 'Tổng thời gian query DB mỗi request',
+    ['view']
+)
+STORAGE_DURATION = REGISTRY.histogram(
+    'minio_call_duration_seconds', 'Thời gian mỗi lời gọi MinIO',
+    ['operation']
+)
+STORAGE_CALLS = REGISTRY.counter(
+    'minio_calls_total', 'Số lời gọi MinIO theo kết quả',
+    ['operation', 'outcome']
+)
+STORAGE_BYTES = REGISTRY.counter(
+    'minio_bytes_total', 'Số byte gửi lên/đọc về từ MinIO',
+    ['operation', 'direction']
+)
+
+
+class RequestStats:
+    """Số liệu của request hiện tại (DB và MinIO), dùng cho log và header Server-Timing"""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.storage_calls = 0
+        self.storage_seconds = 0.0
+        self.storage_bytes = 0
+
+
+# ContextVar được `sync_to_async` copy sang thread chạy ORM, nên query của async view
+# vẫn được tính đúng request
+current_request_stats = ContextVar('current_request_stats', default=None)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """Execute wrapper gắn vào mọi connection: đo query nếu đang trong một request"""
+    stats = current_request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def install_db_execute_wrapper(sender, connection, **kwargs):
+    """Receiver của `connection_created`"""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+class StorageCall:
+    """Được yield bởi `storage_call`; gán `bytes_sent`/`bytes_received` sau khi gọi xong"""
+
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+@contextmanager
+def storage_call(operation: str):
+    """
+    Đo một lời gọi MinIO
+
+    Exception đi qua context manager được tính là `outcome="error"`, riêng lỗi
+    object không tồn tại (stat_object trước khi upload) là `outcome="not_found"`.
+    """
+    if not settings.PRODUCT_METRICS_ENABLED:
+        yield StorageCall()
+        return
+
+    call = StorageCall()
+    outcome = 'success'
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException as e:
+        outcome = 'not_found' if getattr(e, 'code', None) in ('NoSuchKey', 'NoSuchObject') else 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STORAGE_DURATION.observe(elapsed, operation=operation)
+        STORAGE_CALLS.inc(operation=operation, outcome=outcome)
+        if call.bytes_sent:
+            STORAGE_BYTES.inc(call.bytes_sent, operation=operation, direction='sent')
+        if call.bytes_received:
+            STORAGE_BYTES.inc(call.bytes_received, operation=operation, direction='received')
+
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.storage_calls += 1
+            stats.storage_seconds += elapsed
+            stats.storage_bytes += call.bytes_sent + call.bytes_received
+
+
+def observe_request(view: str, method: str, status: int, seconds: float, stats: RequestStats) -> None:
+    REQUEST_DURATION.observe(seconds, view=view, method=method)
+    REQUESTS.inc(view=view, method=method, status=str(status))
+    DB_QUERIES.observe(stats.db_queries, view=view)
+    DB_DURATION.observe(stats.db_seconds, view=view)
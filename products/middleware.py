@@ -0,0 +1,167 @@
+"""
+Middleware đo hiệu năng từng request: latency, số query và thời gian DB, lời gọi MinIO,
+và profile request theo yêu cầu
+"""
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from . import profiling
+from .metrics import RequestStats, current_request_stats, observe_request
+
+timing_logger = logging.getLogger('products.timing')
+
+
+class RequestMetricsMiddleware:
+    """
+    Ghi metrics cho mỗi request, nhãn `view` là tên URL (VD: product-list, product-upload-image)
+
+    Thêm header `Server-Timing` (app/db/storage) và, nếu bật PRODUCT_TIMING_LOG_ENABLED,
+    một dòng log JSON vào logger `products.timing`. Với response streaming (export),
+    thời gian chỉ tính tới lúc response được tạo.
+
+    Hỗ trợ cả sync và async để không ép async view (ASGI) chạy qua thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.PRODUCT_METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request_stats.reset(token)
+        return self.record(request, response, time.perf_counter() - started, stats)
+
+    async def __acall__(self, request):
+        if not settings.PRODUCT_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request_stats.reset(token)
+        return self.record(request, response, time.perf_counter() - started, stats)
+
+    def record(self, request, response, elapsed, stats):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        observe_request(view, request.method, response.status_code, elapsed, stats)
+
+        response['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={stats.db_seconds * 1000:.1f}, '
+            f'storage;dur={stats.storage_seconds * 1000:.1f}'
+        )
+
+        if settings.PRODUCT_TIMING_LOG_ENABLED:
+            timing_logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 2),
+                'db_queries': stats.db_queries,
+                'db_ms': round(stats.db_seconds * 1000, 2),
+                'storage_calls': stats.storage_calls,
+                'storage_ms': round(stats.storage_seconds * 1000, 2),
+                'storage_bytes': stats.storage_bytes,
+            }))
+
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile request theo yêu cầu hoặc lấy mẫu (xem products/profiling.py)
+
+    Đặt sau AuthenticationMiddleware để kiểm tra user staff. Chỉ đọc user khi request
+    có header/param profile, request bình thường không phát sinh thêm query.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.PRODUCT_PROFILING_ENABLED:
+            return self.get_response(request)
+
+        value = profiling.requested_value(request)
+        mode = profiling.resolve_mode(request, value, request.user.is_staff) if value else None
+        profile = self.start_profile(mode)
+        if profile is None:
+            return self.get_response(request)
+
+        token = profiling.current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+            profiling.current_profile.reset(token)
+        return self.finish(request, response, profile, mode)
+
+    async def __acall__(self, request):
+        if not settings.PRODUCT_PROFILING_ENABLED:
+            return await self.get_response(request)
+
+        value = profiling.requested_value(request)
+        mode = None
+        if value:
+            user = await request.auser()
+            mode = profiling.resolve_mode(request, value, user.is_staff)
+        profile = self.start_profile(mode)
+        if profile is None:
+            return await self.get_response(request)
+
+        token = profiling.current_profile.set(profile)
+        # Sync view chạy trong thread riêng của request (thread_sensitive), bật profiler ở đó
+        await sync_to_async(profile.enable_thread)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(profile.disable_thread)()
+            profile.stop()
+            profiling.current_profile.reset(token)
+        return self.finish(request, response, profile, mode)
+
+    def start_profile(self, mode):
+        """RequestProfile đã bật, hoặc None nếu không profile request này"""
+        if mode is None and not profiling.is_sampled():
+            return None
+        profile = profiling.RequestProfile()
+        return profile if profile.start() else None
+
+    def finish(self, request, response, profile, mode):
+        if mode == profiling.INLINE:
+            return profile.report_response(request, response)
+
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        response['X-Profile-Id'] = profile.save(request, response, view)
+        return response
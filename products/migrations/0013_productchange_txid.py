@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:58
+
+from django.db import migrations, models
+
+
+# Gán transaction id (xid8, Postgres 13+) cho mỗi change khi INSERT, kể cả khi ghi bằng
+# bulk_create. Change của cùng transaction dùng chung txid, thứ tự trong transaction theo id.
+CREATE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION products_productchange_set_txid() RETURNS trigger AS $$
+BEGIN
+    NEW.txid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER products_productchange_txid_trigger
+    BEFORE INSERT ON products_productchange
+    FOR EACH ROW EXECUTE FUNCTION products_productchange_set_txid();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS products_productchange_txid_trigger ON products_productchange;
+DROP FUNCTION IF EXISTS products_productchange_set_txid();
+"""
+
+
+def create_txid_trigger(apps, schema_editor):
+    # DB khác Postgres ghi tuần tự, txid luôn là 0 và id đã theo thứ tự commit
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER_SQL)
+
+
+def drop_txid_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_imageuploadjob_started_at'),
+    ]
+
+    operations = [
+        # Change có sẵn giữ txid 0: đứng trước mọi change mới, cursor số nguyên cũ vẫn dùng được
+        migrations.AddField(
+            model_name='productchange',
+            name='txid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='productchange',
+            index=models.Index(fields=['txid', 'id'], name='product_change_cursor_idx'),
+        ),
+        migrations.RunPython(create_txid_trigger, drop_txid_trigger),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_productchange_txid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingobjectdeletion',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,7 @@
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 class Product(models.Model):
@@ -5,6 +9,142 @@ class Product(models.Model):
     name = models.CharField(max_length=100)
     price = models.IntegerField()
     description = models.TextField()
-    status = models.BooleanField(default=False)
+    status = models.BooleanField(default=False, db_index=True)
     image = models.TextField()
+    # Thumbnail/WebP sinh từ ảnh gốc: {"200": {"webp": "<url>"}, ...}
+    image_variants = models.JSONField(default=dict, blank=True)
     post_id = models.TextField()
+    # Lease khi worker claim sản phẩm pending (xem /api/products/pending/claim/)
+    claimed_by = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # Version của row cho ETag/Last-Modified; bulk_update/update() phải tự gán
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # tsvector của name (weight A) + description (weight B), do trigger Postgres cập nhật
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            # Lọc/sort theo giá (?price_min=&price_max=&ordering=price), id làm tie-breaker
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            # Lọc theo status rồi sort theo giá (?status=true&ordering=price)
+            models.Index(fields=['status', 'price', 'id'], name='product_status_price_id_idx'),
+            # Partial index cho danh sách pending (status = False ORDER BY id)
+            models.Index(fields=['id'], condition=models.Q(status=False), name='product_pending_id_idx'),
+            # Partial index cho sản phẩm đã có ảnh nhưng chưa đăng (?has_image=true&has_post_id=false)
+            models.Index(
+                fields=['id'],
+                condition=~models.Q(image='') & models.Q(post_id=''),
+                name='product_ready_to_post_id_idx'
+            ),
+        ]
+
+
+class ImageUploadJob(models.Model):
+    """Job upload ảnh bất đồng bộ (POST /api/products/{id}/upload-image/?async=true)"""
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='image_upload_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # File tạm trên local disk, worker xóa sau khi xử lý xong
+    file_path = models.TextField()
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    file_size = models.IntegerField()
+    image = models.TextField(blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Thời điểm worker claim job, dùng để tìm job bị bỏ dở (xem recover_image_upload_jobs)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+class StoredImage(models.Model):
+    """
+    Object ảnh trên MinIO và số product đang tham chiếu tới nó
+
+    Ảnh được lưu theo SHA-256 nội dung nên nhiều product có thể dùng chung
+    một object; object chỉ bị xóa khi ref_count về 0.
+    """
+    object_name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, blank=True, default='')
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    # Variant map của object này, dùng lại khi ảnh bị upload trùng
+    variants = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class PendingObjectDeletion(models.Model):
+    """Object trên MinIO chờ xóa, được drain theo batch bằng multi-object delete"""
+    object_name = models.CharField(max_length=255, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # Hết hạn lease của drainer đang xóa object; None khi chưa có drainer nào nhận
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class OutboxEvent(models.Model):
+    """
+    Sự kiện thay đổi Product chờ gửi tới webhook (transactional outbox)
+
+    Được ghi trong cùng transaction với thay đổi của Product, mỗi webhook URL
+    một row để retry độc lập. Row bị xóa sau khi gửi thành công.
+    """
+    TYPE_PRODUCT_CREATED = 'product.created'
+    TYPE_PRODUCT_IMAGE_UPDATED = 'product.image_updated'
+    TYPE_PRODUCT_POST_ID_UPDATED = 'product.post_id_updated'
+
+    event_type = models.CharField(max_length=50)
+    # Không dùng ForeignKey: sự kiện vẫn được gửi khi product đã bị xóa
+    product_id = models.IntegerField()
+    payload = models.JSONField(default=dict)
+    target_url = models.TextField()
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # Thời điểm được gửi (lại); None = đã hết số lần retry, không gửi nữa
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id'], name='outbox_next_attempt_idx'),
+        ]
+
+
+class ProductChange(models.Model):
+    """
+    Change log của Product cho change feed (GET /api/products/changes/?since=<cursor>)
+
+    (`txid`, `id`) là cursor của feed. Chỉ lưu loại thay đổi, dữ liệu trả về là
+    trạng thái hiện tại của product; row cũ của cùng product có thể được compact.
+    """
+    OPERATION_CREATED = 'created'
+    OPERATION_UPDATED = 'updated'
+    OPERATION_DELETED = 'deleted'
+
+    # Không dùng ForeignKey: tombstone phải còn sau khi product bị xóa
+    product_id = models.IntegerField()
+    operation = models.CharField(max_length=10)
+    # Transaction id ghi change, do trigger trên Postgres gán (0 trên DB khác)
+    txid = models.BigIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Cursor của feed
+            models.Index(fields=['txid', 'id'], name='product_change_cursor_idx'),
+            # Compact: tìm change mới hơn của cùng product
+            models.Index(fields=['product_id', 'id'], name='product_change_product_idx'),
+        ]
@@ -0,0 +1,256 @@
+"""
+Transactional outbox: đẩy thay đổi của Product tới webhook (VD: n8n) thay vì để n8n poll /pending
+
+Request path chỉ ghi OutboxEvent trong cùng transaction với thay đổi của Product;
+việc gửi được thực hiện theo batch bởi background thread (sau commit) hoặc lệnh
+`manage.py dispatch_outbox`. Gửi ít nhất một lần: webhook dùng `id` của event để bỏ trùng.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import urllib3
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+from .serializers import ProductSerializer
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_dispatch_lock = threading.Lock()
+_dispatch_scheduled = False
+_http = None
+
+
+def enqueue_events(event_type: str, payloads) -> None:
+    """
+    Ghi sự kiện cho từng webhook URL, phải gọi trong transaction của thay đổi
+
+    Args:
+        event_type: Một trong OutboxEvent.TYPE_*
+        payloads: Danh sách dict, mỗi dict phải có `id` của product
+    """
+    urls = settings.PRODUCT_WEBHOOK_URLS
+    payloads = list(payloads)
+    if not urls or not payloads:
+        return
+    now = timezone.now()
+    OutboxEvent.objects.bulk_create(
+        [
+            OutboxEvent(
+                event_type=event_type,
+                product_id=payload['id'],
+                payload=payload,
+                target_url=url,
+                next_attempt_at=now
+            )
+            for payload in payloads
+            for url in urls
+        ],
+        batch_size=settings.PRODUCT_BULK_BATCH_SIZE
+    )
+    if settings.PRODUCT_OUTBOX_AUTO_DISPATCH:
+        transaction.on_commit(schedule_dispatch)
+
+
+def enqueue_event(event_type: str, payload: dict) -> None:
+    enqueue_events(event_type, [payload])
+
+
+def product_payload(product) -> dict:
+    """Dữ liệu product trong event, cùng format với API (ProductSerializer)"""
+    return ProductSerializer(product).data
+
+
+def _get_http() -> urllib3.PoolManager:
+    global _http
+    if _http is None:
+        _http = urllib3.PoolManager(
+            timeout=urllib3.util.Timeout(total=settings.PRODUCT_WEBHOOK_TIMEOUT),
+            # Retry do dispatcher quản lý (backoff theo từng event)
+            retries=False
+        )
+    return _http
+
+
+def build_body(events) -> bytes:
+    return json.dumps({
+        'events': [
+            {
+                'id': event.id,
+                'type': event.event_type,
+                'product_id': event.product_id,
+                'created_at': event.created_at,
+                'data': event.payload,
+            }
+            for event in events
+        ]
+    }, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
+def post_events(url: str, events) -> str:
+    """
+    POST một batch event tới webhook
+
+    Returns:
+        Chuỗi lỗi, hoặc '' nếu webhook trả 2xx
+    """
+    body = build_body(events)
+    headers = {'Content-Type': 'application/json'}
+    if settings.PRODUCT_WEBHOOK_SECRET:
+        signature = hmac.new(settings.PRODUCT_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        headers['X-Webhook-Signature'] = f'sha256={signature}'
+    try:
+        response = _get_http().request('POST', url, body=body, headers=headers)
+    except urllib3.exceptions.HTTPError as e:
+        return str(e)
+    if 200 <= response.status < 300:
+        return ''
+    return f'HTTP {response.status}: {response.data[:200].decode("utf-8", "replace")}'
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff theo số lần đã thử, tối đa PRODUCT_OUTBOX_RETRY_MAX_DELAY"""
+    seconds = settings.PRODUCT_OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.PRODUCT_OUTBOX_RETRY_MAX_DELAY))
+
+
+def claim_events(batch_size: int, after_id: int = 0) -> list:
+    """
+    Lease một batch event tới hạn trong một transaction ngắn
+
+    Các row được khóa với SKIP LOCKED rồi dời `next_attempt_at` tới hết lease, nên
+    dispatcher khác không lấy lại batch trong lúc đang gửi. Nếu dispatcher chết giữa
+    chừng, event được gửi lại khi lease hết hạn.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now, id__gt=after_id)
+            .order_by('id')[:batch_size]
+        )
+        if batch:
+            OutboxEvent.objects.filter(id__in=[event.id for event in batch]).update(
+                next_attempt_at=now + timedelta(seconds=settings.PRODUCT_OUTBOX_LEASE_SECONDS)
+            )
+    return batch
+
+
+def dispatch_outbox(batch_size: int = None) -> dict:
+    """
+    Gửi các event tới hạn theo batch (mỗi webhook URL một request mỗi batch)
+
+    Mỗi batch gồm ba bước: lease event (transaction ngắn), POST tới webhook ngoài
+    transaction (không giữ lock/connection trong lúc chờ webhook), ghi kết quả
+    (transaction ngắn). Nhiều dispatcher có thể chạy song song. Event gửi lỗi được giữ
+    lại với `next_attempt_at` lùi theo backoff; sau PRODUCT_OUTBOX_MAX_ATTEMPTS lần thì
+    dừng (next_attempt_at = None, xem requeue_dead_events/purge_dead_events).
+
+    Returns:
+        {"sent": số event đã gửi, "failed": số event lỗi}
+    """
+    batch_size = batch_size or settings.PRODUCT_OUTBOX_BATCH_SIZE
+    sent = failed = 0
+    last_id = 0
+    while True:
+        batch = claim_events(batch_size, last_id)
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        by_url = {}
+        for event in batch:
+            by_url.setdefault(event.target_url, []).append(event)
+
+        done_ids = []
+        retried = []
+        for url, events in by_url.items():
+            error = post_events(url, events)
+            if not error:
+                done_ids.extend(event.id for event in events)
+                continue
+            logger.warning("Webhook %s failed for %d event(s): %s", url, len(events), error)
+            now = timezone.now()
+            for event in events:
+                event.attempts += 1
+                event.last_error = error
+                if event.attempts >= settings.PRODUCT_OUTBOX_MAX_ATTEMPTS:
+                    event.next_attempt_at = None
+                else:
+                    event.next_attempt_at = now + retry_delay(event.attempts)
+                retried.append(event)
+
+        with transaction.atomic():
+            OutboxEvent.objects.filter(id__in=done_ids).delete()
+            OutboxEvent.objects.bulk_update(retried, ['attempts', 'last_error', 'next_attempt_at'])
+
+        sent += len(done_ids)
+        failed += len(retried)
+    return {'sent': sent, 'failed': failed}
+
+
+def dead_events():
+    """Event đã hết số lần retry (next_attempt_at = None), không còn được gửi"""
+    return OutboxEvent.objects.filter(next_attempt_at__isnull=True)
+
+
+def requeue_dead_events(queryset=None) -> int:
+    """
+    Gửi lại event đã hết số lần retry (VD: sau khi sửa webhook), với đủ số lần retry mới
+
+    Returns:
+        Số event được đưa lại vào hàng đợi
+    """
+    queryset = dead_events() if queryset is None else queryset.filter(next_attempt_at__isnull=True)
+    count = queryset.update(next_attempt_at=timezone.now(), attempts=0)
+    if count and settings.PRODUCT_OUTBOX_AUTO_DISPATCH:
+        transaction.on_commit(schedule_dispatch)
+    return count
+
+
+def purge_dead_events(queryset=None) -> int:
+    """
+    Xóa event đã hết số lần retry
+
+    Returns:
+        Số event đã xóa
+    """
+    queryset = dead_events() if queryset is None else queryset.filter(next_attempt_at__isnull=True)
+    deleted, _ = queryset.delete()
+    return deleted
+
+
+def schedule_dispatch() -> None:
+    """Lên lịch một lần dispatch ở background thread (gộp nhiều lần gọi liên tiếp)"""
+    global _executor, _dispatch_scheduled
+    with _dispatch_lock:
+        if _dispatch_scheduled:
+            return
+        _dispatch_scheduled = True
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox-dispatch')
+    _executor.submit(_run_scheduled_dispatch)
+
+
+def _run_scheduled_dispatch() -> None:
+    global _dispatch_scheduled
+    with _dispatch_lock:
+        # Reset trước khi chạy: event được ghi trong lúc dispatch sẽ có lượt dispatch tiếp theo
+        _dispatch_scheduled = False
+    close_old_connections()
+    try:
+        dispatch_outbox()
+    except Exception:
+        logger.exception("Dispatching outbox events failed")
+    finally:
+        close_old_connections()
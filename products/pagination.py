@@ -0,0 +1,41 @@
+"""
+Pagination cho Product API
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination theo id
+
+    Mỗi trang chỉ là một truy vấn `WHERE id > ... ORDER BY id LIMIT n`,
+    không cần COUNT(*), nên thời gian phản hồi không phụ thuộc số lượng sản phẩm.
+    """
+    ordering = 'id'
+    page_size = settings.PRODUCT_CURSOR_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PRODUCT_CURSOR_MAX_PAGE_SIZE
+
+    def is_requested(self, request) -> bool:
+        """Client bật chế độ cursor bằng cách gửi `cursor` hoặc `page_size`"""
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """
+    Page number pagination cho kết quả search (`?q=`)
+
+    Kết quả sắp xếp theo rank (không unique, không tăng dần) nên không dùng được
+    cursor theo id; COUNT(*) ở đây chỉ đếm các row khớp trong GIN index.
+    """
+    page_size = settings.PRODUCT_CURSOR_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PRODUCT_CURSOR_MAX_PAGE_SIZE
+
+    def is_requested(self, request) -> bool:
+        """Kết quả search luôn được phân trang"""
+        return True
@@ -0,0 +1,183 @@
+"""
+Profile một request (cProfile + các câu SQL đã chạy) để tìm chỗ chậm trên môi trường thật
+
+Bật theo request bằng header `X-Profile` hoặc query param `_profile` (user staff, hoặc gửi
+kèm header `X-Profile-Token` bằng PRODUCT_PROFILING_TOKEN), hoặc lấy mẫu ngẫu nhiên theo
+PRODUCT_PROFILING_SAMPLE_RATE. Giá trị `inline` trả luôn báo cáo text thay cho response;
+các trường hợp khác lưu `<id>.prof` (đọc bằng pstats/snakeviz) và `<id>.sql.json`
+vào PRODUCT_PROFILING_DIR.
+
+Mỗi process chỉ profile một request tại một thời điểm (cProfile gắn vào thread, các
+request async chạy chung event loop), request tới khi đang bận thì chạy bình thường.
+Dưới ASGI, báo cáo gộp profiler của event loop và của thread chạy sync view.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+# Cho client không đăng nhập staff (curl, script), so với PRODUCT_PROFILING_TOKEN
+TOKEN_HEADER = 'HTTP_X_PROFILE_TOKEN'
+INLINE = 'inline'
+STORE = 'store'
+# Số hàm hiển thị trong báo cáo inline
+REPORT_LIMIT = 60
+
+_profiling_lock = threading.Lock()
+
+
+def requested_value(request):
+    """Giá trị header `X-Profile`/param `_profile` (None nếu không gửi)"""
+    return request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM) or None
+
+
+def resolve_mode(request, value: str, is_staff: bool):
+    """
+    Chế độ profile (`inline` hoặc `store`) cho giá trị client đã gửi
+
+    Returns:
+        None nếu không có quyền (không phải staff và sai token)
+    """
+    token = settings.PRODUCT_PROFILING_TOKEN
+    has_token = bool(token) and constant_time_compare(request.META.get(TOKEN_HEADER, ''), token)
+    if not (is_staff or has_token):
+        return None
+    return INLINE if value == INLINE else STORE
+
+
+def is_sampled() -> bool:
+    rate = settings.PRODUCT_PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class RequestProfile:
+    """Profiler và danh sách SQL của một request"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        # Profiler của thread chạy sync view dưới ASGI (xem enable_thread)
+        self.thread_profiler = None
+        self.thread_id = None
+        self.queries = []
+        self.started = None
+        self.duration = None
+
+    def start(self) -> bool:
+        """Bật profiler; False nếu process đang profile request khác"""
+        if not _profiling_lock.acquire(blocking=False):
+            return False
+        self.profiler.enable()
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        return True
+
+    def enable_thread(self) -> None:
+        """
+        Bật thêm profiler trong thread hiện tại
+
+        cProfile chỉ ghi nhận thread đã gọi enable(): dưới ASGI, middleware chạy trong
+        event loop còn sync view (DRF) chạy trong thread của `sync_to_async`, nên hàm này
+        được gọi trong chính thread đó trước khi chạy view.
+        """
+        if threading.get_ident() == self.thread_id:
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: cProfile dùng sys.monitoring, profiler đang bật đã ghi nhận mọi thread
+            return
+        self.thread_profiler = profiler
+
+    def disable_thread(self) -> None:
+        if self.thread_profiler is not None:
+            self.thread_profiler.disable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        _profiling_lock.release()
+
+    def report(self, request, response) -> str:
+        """Báo cáo text: tổng quan, SQL và các hàm tốn thời gian nhất (theo cumulative)"""
+        stream = io.StringIO()
+        sql_ms = sum(query['duration_ms'] for query in self.queries)
+        stream.write(
+            f"{request.method} {request.get_full_path()} -> {response.status_code}\n"
+            f"Total: {self.duration * 1000:.1f}ms, SQL: {len(self.queries)} queries, {sql_ms:.1f}ms\n\n"
+        )
+        for index, query in enumerate(self.queries, 1):
+            stream.write(f"[{index}] {query['duration_ms']:.2f}ms {query['sql']}\n")
+        stream.write('\n')
+        self.stats(stream).sort_stats('cumulative').print_stats(REPORT_LIMIT)
+        return stream.getvalue()
+
+    def stats(self, stream=None) -> pstats.Stats:
+        """Stats gộp của event loop và thread chạy view"""
+        stats = pstats.Stats(self.profiler, stream=stream)
+        if self.thread_profiler is not None:
+            stats.add(self.thread_profiler)
+        return stats
+
+    def save(self, request, response, view: str) -> str:
+        """Lưu profile và SQL vào PRODUCT_PROFILING_DIR, trả về id của profile"""
+        profile_id = '{}-{}-{}'.format(
+            timezone.now().strftime('%Y%m%dT%H%M%S'),
+            re.sub(r'[^\w.-]', '_', view),
+            uuid.uuid4().hex[:8]
+        )
+        directory = settings.PRODUCT_PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.stats().dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+        with open(os.path.join(directory, f'{profile_id}.sql.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration_ms': round(self.duration * 1000, 2),
+                'queries': self.queries,
+            }, f, ensure_ascii=False, indent=2)
+        return profile_id
+
+    def report_response(self, request, response) -> HttpResponse:
+        return HttpResponse(self.report(request, response), content_type='text/plain; charset=utf-8')
+
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+def sql_capture_wrapper(execute, sql, params, many, context):
+    """Execute wrapper gắn vào mọi connection: ghi lại SQL nếu request đang được profile"""
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append({
+            'sql': sql,
+            'params': repr(params),
+            'many': many,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        })
+
+
+def install_sql_capture_wrapper(sender, connection, **kwargs):
+    """Receiver của `connection_created`"""
+    if sql_capture_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_capture_wrapper)
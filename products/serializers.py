@@ -1,12 +1,118 @@
-from rest_framework import serializers
-from .models import Product
+import os
 
-class ProductSerializer(serializers.ModelSerializer):
+from django.conf import settings
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import ImageUploadJob, Product
+
+
+def parse_sparse_fields(query_params, allowed_fields):
+    """
+    Đọc `?fields=` / `?exclude=` (danh sách cách nhau bởi dấu phẩy)
+
+    Trả về danh sách field cần trả về (giữ thứ tự của serializer),
+    hoặc None nếu client không yêu cầu.
+    """
+    requested = {}
+    for param in ('fields', 'exclude'):
+        value = query_params.get(param)
+        if value is None:
+            continue
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed_fields]
+        if unknown:
+            raise serializers.ValidationError({
+                param: f"Field không hợp lệ: {', '.join(unknown)}. Chỉ chấp nhận: {', '.join(allowed_fields)}"
+            })
+        requested[param] = set(names)
+
+    if not requested:
+        return None
+
+    selected = [
+        name for name in allowed_fields
+        if name in requested.get('fields', allowed_fields)
+        and name not in requested.get('exclude', ())
+    ]
+    if not selected:
+        raise serializers.ValidationError({'fields': 'Phải giữ lại ít nhất một field'})
+    return selected
+
+
+class SparseFieldsMixin:
+    """Cho phép truyền `fields=[...]` khi khởi tạo serializer để chỉ trả về các field đó"""
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ValuesRepresentation:
+    """
+    Fast path cho list: chuyển row của `.values()` thành output giống hệt ModelSerializer
+
+    Chỉ dùng được với serializer mà mọi field đều là cột model. Các field như
+    IntegerField/CharField/BooleanField/JSONField trả nguyên giá trị từ DB nên bỏ qua,
+    chỉ gọi `to_representation` cho field cần format (datetime, decimal, ...).
+    """
+    PASSTHROUGH_FIELDS = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.BooleanField,
+        serializers.JSONField,
+    )
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class(fields=fields) if fields else serializer_class()
+        self.fields = list(serializer.fields)
+        self.converters = {
+            name: self._get_converter(field)
+            for name, field in serializer.fields.items()
+            if not isinstance(field, self.PASSTHROUGH_FIELDS)
+        }
+
+    @staticmethod
+    def _get_converter(field):
+        """
+        DateTimeField.to_representation kiểm tra timezone từng giá trị nên khá chậm;
+        với format ISO 8601 mặc định thì chuyển timezone và format trực tiếp, kết quả như nhau
+        """
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if (
+            isinstance(field, serializers.DateTimeField)
+            and output_format is not None
+            and output_format.lower() == ISO_8601
+        ):
+            field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if field_timezone is not None:
+                def convert(value):
+                    value = value.astimezone(field_timezone).isoformat()
+                    if value.endswith('+00:00'):
+                        value = value[:-6] + 'Z'
+                    return value
+                return convert
+        return field.to_representation
+
+    def to_representation(self, rows, extra_fields=()):
+        """Sửa trực tiếp các dict trong `rows`, bỏ các cột chỉ dùng cho pagination"""
+        for row in rows:
+            for name, convert in self.converters.items():
+                value = row[name]
+                if value is not None:
+                    row[name] = convert(value)
+            for name in extra_fields:
+                del row[name]
+        return rows
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer đầy đủ cho Product"""
     class Meta:
         model = Product
-        fields = ['id', 'name', 'price', 'description', 'status', 'image', 'post_id']
-        read_only_fields = ['id']
+        fields = ['id', 'name', 'price', 'description', 'status', 'image', 'image_variants', 'post_id', 'updated_at']
+        read_only_fields = ['id', 'image_variants', 'updated_at']
 
 class ProductCreateSerializer(serializers.ModelSerializer):
     """Serializer để tạo Product mới"""
@@ -20,27 +126,79 @@ class ProductCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Giá sản phẩm phải lớn hơn 0")
         return value
 
+# Ràng buộc ảnh sản phẩm (dùng chung cho upload qua Django và presigned upload)
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+ALLOWED_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+IMAGE_CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+
+
+def validate_image_extension(filename):
+    """Validate đuôi file ảnh, trả về extension (lowercase)"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ALLOWED_IMAGE_EXTENSIONS:
+        raise serializers.ValidationError(
+            f"Định dạng file không hợp lệ. Chỉ chấp nhận: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
+        )
+    return ext
+
+
+class StreamedImageField(serializers.ImageField):
+    """
+    ImageField nhận file từ ImageStreamUploadHandler (products/uploads.py)
+
+    File từ handler đó (có `image_format`) đã được Pillow kiểm tra khi nhận xong nên
+    không mở lại; file từ upload handler mặc định vẫn được kiểm tra như ImageField.
+    """
+    def to_internal_value(self, data):
+        if getattr(data, 'image_format', None):
+            return serializers.FileField.to_internal_value(self, data)
+        return super().to_internal_value(data)
+
+
 class ProductImageUploadSerializer(serializers.Serializer):
     """Serializer để upload ảnh cho Product"""
-    image = serializers.ImageField(required=True)
+    image = StreamedImageField(required=True)
     
     def validate_image(self, value):
         """Validate image file"""
         # Kiểm tra kích thước file (max 5MB)
-        if value.size > 5 * 1024 * 1024:
+        if value.size > MAX_IMAGE_SIZE:
             raise serializers.ValidationError("Kích thước ảnh không được vượt quá 5MB")
         
         # Kiểm tra định dạng file
-        allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        import os
-        ext = os.path.splitext(value.name)[1].lower()
-        if ext not in allowed_extensions:
-            raise serializers.ValidationError(
-                f"Định dạng file không hợp lệ. Chỉ chấp nhận: {', '.join(allowed_extensions)}"
-            )
+        ext = validate_image_extension(value.name)
+        
+        # Nội dung (magic bytes) phải khớp với đuôi file
+        image_format = getattr(value, 'image_format', None)
+        if image_format and IMAGE_CONTENT_TYPES[ext] != f'image/{image_format}':
+            raise serializers.ValidationError(f"Nội dung file không khớp với đuôi file {ext}")
         
         return value
 
+class ProductImagePresignSerializer(serializers.Serializer):
+    """Serializer để xin presigned POST policy upload ảnh thẳng lên MinIO"""
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.ChoiceField(choices=sorted(set(IMAGE_CONTENT_TYPES.values())))
+    
+    def validate(self, attrs):
+        """Content-Type phải khớp với đuôi file"""
+        ext = validate_image_extension(attrs['filename'])
+        if IMAGE_CONTENT_TYPES[ext] != attrs['content_type']:
+            raise serializers.ValidationError(
+                {'content_type': f"Content-Type không khớp với đuôi file {ext}"}
+            )
+        return attrs
+
+class ProductImageCompleteSerializer(serializers.Serializer):
+    """Serializer để xác nhận đã upload xong ảnh qua presigned POST"""
+    upload_token = serializers.CharField()
+
 class ProductUpdateDescriptionSerializer(serializers.ModelSerializer):
     """Serializer để cập nhật description"""
     class Meta:
@@ -59,8 +217,49 @@ class ProductUpdatePostIdSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Post ID không được để trống")
         return value
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductPostIdItemSerializer(serializers.Serializer):
+    """Một cặp (product id, post_id) trong bulk update"""
+    id = serializers.IntegerField()
+    post_id = serializers.CharField()
+    
+    def validate_post_id(self, value):
+        """Validate post_id không được rỗng"""
+        if not value or not value.strip():
+            raise serializers.ValidationError("Post ID không được để trống")
+        return value
+
+class ProductBulkUpdatePostIdSerializer(serializers.Serializer):
+    """Serializer để cập nhật post_id cho nhiều sản phẩm"""
+    items = ProductPostIdItemSerializer(
+        many=True, allow_empty=False, max_length=settings.PRODUCT_BULK_MAX_ITEMS
+    )
+
+class ProductListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer cho list view - ẩn một số thông tin nhạy cảm"""
     class Meta:
         model = Product
-        fields = ['id', 'name', 'price', 'description', 'status', 'image']
+        fields = ['id', 'name', 'price', 'description', 'status', 'image', 'image_variants', 'updated_at']
+
+class ProductClaimSerializer(serializers.Serializer):
+    """Serializer để worker claim (lease) các sản phẩm pending"""
+    worker_id = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.PRODUCT_CLAIM_MAX_BATCH, default=10
+    )
+    lease_seconds = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.PRODUCT_CLAIM_MAX_LEASE_SECONDS,
+        default=settings.PRODUCT_CLAIM_DEFAULT_LEASE_SECONDS
+    )
+
+class ProductReleaseSerializer(serializers.Serializer):
+    """Serializer để worker trả lại các sản phẩm đã claim nhưng chưa xử lý"""
+    worker_id = serializers.CharField(max_length=100)
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+class ImageUploadJobSerializer(serializers.ModelSerializer):
+    """Serializer cho trạng thái job upload ảnh bất đồng bộ"""
+    class Meta:
+        model = ImageUploadJob
+        fields = ['id', 'product', 'status', 'image', 'error', 'created_at', 'finished_at']
+        read_only_fields = fields
@@ -1,55 +1,216 @@
 """
 MinIO Service để xử lý upload và quản lý ảnh
 """
+import hashlib
+import io
+import json
+import logging
 import os
+import threading
+import time
 import uuid
-from datetime import timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+import certifi
+import urllib3
 from minio import Minio
+from minio.datatypes import PostPolicy
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import storage_call
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredObject:
+    """Kết quả lưu ảnh theo nội dung (content-addressed)"""
+    object_name: str
+    url: str
+    size: int
+    # False nếu object cùng nội dung đã có sẵn và bỏ qua put_object
+    created: bool
+
+
+class PresignedUrlCache:
+    """
+    Cache presigned URL (LRU, giới hạn số entry) trong process
+    
+    URL đã ký được dùng lại cho tới khi thời gian hiệu lực còn lại nhỏ hơn
+    `refresh_ratio` * expiry. Có thể dùng thêm một Django cache backend
+    (VD: Redis) để chia sẻ URL giữa các process.
+    """
+    
+    def __init__(self, max_entries: int, refresh_ratio: float, backend_alias: Optional[str] = None):
+        self.max_entries = max_entries
+        self.refresh_ratio = refresh_ratio
+        self.backend_alias = backend_alias
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def _backend(self):
+        return caches[self.backend_alias] if self.backend_alias else None
+    
+    def _is_fresh(self, valid_until: float, expiry: int, now: float) -> bool:
+        return valid_until - now > expiry * self.refresh_ratio
+    
+    def get(self, key: str, expiry: int) -> Optional[str]:
+        """URL còn đủ hạn trong cache, hoặc None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry[1], expiry, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        
+        backend = self._backend
+        if backend is not None:
+            entry = backend.get(key)
+            if entry and self._is_fresh(entry[1], expiry, now):
+                self._store_local(key, entry)
+                with self._lock:
+                    self.hits += 1
+                return entry[0]
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def set(self, key: str, url: str, expiry: int) -> None:
+        """Lưu URL vừa ký (hiệu lực `expiry` giây kể từ bây giờ)"""
+        entry = (url, time.time() + expiry)
+        self._store_local(key, entry)
+        backend = self._backend
+        if backend is not None:
+            backend.set(key, entry, timeout=max(1, int(expiry * (1 - self.refresh_ratio))))
+    
+    def _store_local(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
 
 
 class MinioService:
     """Service để tương tác với MinIO"""
     
     def __init__(self):
-        self.client = Minio(
+        self.bucket_name = settings.MINIO_BUCKET_NAME
+        self.presigned_url_cache = PresignedUrlCache(
+            max_entries=settings.MINIO_PRESIGNED_URL_CACHE_SIZE,
+            refresh_ratio=settings.MINIO_PRESIGNED_URL_CACHE_REFRESH_RATIO,
+            backend_alias=settings.MINIO_PRESIGNED_URL_CACHE_BACKEND
+        )
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._bucket_checked = False
+    
+    @property
+    def client(self) -> Minio:
+        """
+        MinIO client, chỉ được tạo ở lần dùng đầu tiên
+        
+        Import module (manage.py, worker) không mở kết nối tới MinIO;
+        bucket được kiểm tra/tạo một lần khi client được dùng lần đầu.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        if not self._bucket_checked:
+            self._ensure_bucket_exists()
+        return self._client
+    
+    @client.setter
+    def client(self, value: Minio):
+        """Thay client (VD: fake client khi benchmark); bỏ qua bước tạo bucket"""
+        self._client = value
+        self._bucket_checked = True
+    
+    def _create_client(self) -> Minio:
+        """Tạo client với connection pool, timeout và retry cấu hình từ settings"""
+        http_client = urllib3.PoolManager(
+            num_pools=settings.MINIO_POOL_NUM_POOLS,
+            maxsize=settings.MINIO_POOL_MAXSIZE,
+            block=settings.MINIO_POOL_BLOCK,
+            timeout=urllib3.util.Timeout(
+                connect=settings.MINIO_CONNECT_TIMEOUT,
+                read=settings.MINIO_READ_TIMEOUT
+            ),
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+            retries=urllib3.Retry(
+                total=settings.MINIO_MAX_RETRIES,
+                backoff_factor=settings.MINIO_RETRY_BACKOFF,
+                status_forcelist=[500, 502, 503, 504]
+            )
+        )
+        return Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_USE_SSL
+            secure=settings.MINIO_USE_SSL,
+            # Khai báo region để không phải gọi GetBucketLocation trước mỗi bucket
+            region=settings.MINIO_REGION,
+            http_client=http_client
         )
-        self.bucket_name = settings.MINIO_BUCKET_NAME
-        self._ensure_bucket_exists()
     
     def _ensure_bucket_exists(self):
-        """Đảm bảo bucket tồn tại, nếu không thì tạo mới"""
-        try:
-            if not self.client.bucket_exists(self.bucket_name):
-                self.client.make_bucket(self.bucket_name)
-                # Set bucket policy để public read
-                policy = {
-                    "Version": "2012-10-17",
-                    "Statement": [
-                        {
-                            "Effect": "Allow",
-                            "Principal": {"AWS": "*"},
-                            "Action": ["s3:GetObject"],
-                            "Resource": [f"arn:aws:s3:::{self.bucket_name}/*"]
-                        }
-                    ]
-                }
-                import json
-                self.client.set_bucket_policy(self.bucket_name, json.dumps(policy))
-        except S3Error as e:
-            print(f"Error creating bucket: {e}")
+        """Đảm bảo bucket tồn tại, nếu không thì tạo mới (chỉ chạy một lần mỗi process)"""
+        with self._client_lock:
+            if self._bucket_checked:
+                return
+            try:
+                with storage_call('bucket_exists'):
+                    exists = self._client.bucket_exists(self.bucket_name)
+                if not exists:
+                    with storage_call('make_bucket'):
+                        self._client.make_bucket(self.bucket_name)
+                    # Set bucket policy để public read
+                    policy = {
+                        "Version": "2012-10-17",
+                        "Statement": [
+                            {
+                                "Effect": "Allow",
+                                "Principal": {"AWS": "*"},
+                                "Action": ["s3:GetObject"],
+                                "Resource": [f"arn:aws:s3:::{self.bucket_name}/*"]
+                            }
+                        ]
+                    }
+                    with storage_call('set_bucket_policy'):
+                        self._client.set_bucket_policy(self.bucket_name, json.dumps(policy))
+                self._bucket_checked = True
+            except (S3Error, urllib3.exceptions.HTTPError) as e:
+                # MinIO chưa sẵn sàng: lần dùng client tiếp theo sẽ kiểm tra lại
+                logger.error("Error creating bucket: %s", e)
     
     def upload_image(self, file, folder: str = "") -> Optional[str]:
         """
         Upload ảnh lên MinIO
         
+        Tên object được tạo từ SHA-256 nội dung file, nên cùng một ảnh
+        upload nhiều lần chỉ được lưu (và truyền) một lần.
+        
         Args:
             file: File object từ request.FILES
             folder: Thư mục lưu trữ trong bucket (optional)
@@ -57,35 +218,210 @@ class MinioService:
         Returns:
             URL của ảnh đã upload hoặc None nếu thất bại
         """
+        object_name = self.build_content_object_name(self.hash_file(file), file.name, folder)
+        stored = self.store_image(file, object_name)
+        return stored.url if stored else None
+    
+    def hash_file(self, file) -> str:
+        """
+        SHA-256 của nội dung file (đọc theo chunk, không load toàn bộ vào RAM)
+        
+        Nếu upload handler đã tính digest trong lúc nhận request thì dùng lại.
+        """
+        digest = getattr(file, 'sha256', None)
+        if digest:
+            return digest
+        
+        hasher = hashlib.sha256()
+        file.seek(0)
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            hasher.update(chunk)
+        file.seek(0)
+        return hasher.hexdigest()
+    
+    def build_content_object_name(self, digest: str, filename: str, folder: str = "") -> str:
+        """Tên object theo nội dung: <digest><ext>"""
+        file_extension = os.path.splitext(filename)[1].lower()
+        if folder:
+            return f"{folder}/{digest}{file_extension}"
+        return f"{digest}{file_extension}"
+    
+    def store_image(self, file, object_name: str) -> Optional[StoredObject]:
+        """
+        Lưu file với tên object cho trước, bỏ qua put_object nếu object đã tồn tại
+        
+        Args:
+            file: File object (có name, size, content_type)
+            object_name: Tên object (thường từ build_content_object_name)
+            
+        Returns:
+            StoredObject hoặc None nếu thất bại
+        """
+        if self.stat_image(object_name) is not None:
+            return StoredObject(
+                object_name=object_name,
+                url=self.get_public_url(object_name),
+                size=file.size,
+                created=False
+            )
+        
+        try:
+            file.seek(0)
+            with storage_call('put_object') as call:
+                self.client.put_object(
+                    self.bucket_name,
+                    object_name,
+                    file,
+                    length=file.size,
+                    content_type=file.content_type
+                )
+                call.bytes_sent = file.size
+        except S3Error as e:
+            logger.error("Error uploading file: %s", e)
+            return None
+        
+        return StoredObject(
+            object_name=object_name,
+            url=self.get_public_url(object_name),
+            size=file.size,
+            created=True
+        )
+    
+    def upload_bytes(self, object_name: str, data: bytes, content_type: str) -> Optional[str]:
+        """
+        Upload dữ liệu có sẵn trong bộ nhớ (VD: thumbnail) lên MinIO
+        
+        Returns:
+            URL public của object hoặc None nếu thất bại
+        """
         try:
-            # Tạo tên file unique
-            file_extension = os.path.splitext(file.name)[1]
-            if folder:
-                unique_filename = f"{folder}/{uuid.uuid4()}{file_extension}"
-            else:
-                unique_filename = f"{uuid.uuid4()}{file_extension}"
+            with storage_call('put_object') as call:
+                self.client.put_object(
+                    self.bucket_name,
+                    object_name,
+                    io.BytesIO(data),
+                    length=len(data),
+                    content_type=content_type
+                )
+                call.bytes_sent = len(data)
+            return self.get_public_url(object_name)
+        except S3Error as e:
+            logger.error("Error uploading file: %s", e)
+            return None
+    
+    def get_object_bytes(self, object_name: str) -> Optional[bytes]:
+        """Đọc toàn bộ nội dung object (dùng cho ảnh nhỏ)"""
+        response = None
+        try:
+            with storage_call('get_object') as call:
+                response = self.client.get_object(self.bucket_name, object_name)
+                data = response.read()
+                call.bytes_received = len(data)
+            return data
+        except S3Error as e:
+            logger.error("Error reading file: %s", e)
+            return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+    
+    def read_object_head(self, object_name: str, length: int) -> Optional[bytes]:
+        """Đọc tối đa `length` byte đầu của object (range request, không tải cả object)"""
+        response = None
+        try:
+            with storage_call('get_object') as call:
+                response = self.client.get_object(self.bucket_name, object_name, offset=0, length=length)
+                data = response.read()
+                call.bytes_received = len(data)
+            return data
+        except S3Error as e:
+            logger.error("Error reading file: %s", e)
+            return None
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+    
+    def get_object_name(self, image_url: str) -> str:
+        """Lấy tên object từ URL public"""
+        return image_url.split(f"{self.bucket_name}/", 1)[-1]
+    
+    def build_object_name(self, filename: str, folder: str = "") -> str:
+        """Tạo tên object unique (giữ nguyên đuôi file)"""
+        file_extension = os.path.splitext(filename)[1]
+        if folder:
+            return f"{folder}/{uuid.uuid4()}{file_extension}"
+        return f"{uuid.uuid4()}{file_extension}"
+    
+    def get_public_url(self, object_name: str) -> str:
+        """URL public của object trong bucket"""
+        return f"{settings.MINIO_PUBLIC_URL}/{self.bucket_name}/{object_name}"
+    
+    def get_presigned_upload(
+        self,
+        object_name: str,
+        content_type: str,
+        max_size: int,
+        expiry: int = 600
+    ) -> Optional[dict]:
+        """
+        Tạo presigned POST policy để client upload thẳng lên MinIO
+        
+        Policy ràng buộc đúng tên object, Content-Type và kích thước tối đa,
+        MinIO sẽ từ chối mọi request vi phạm.
+        
+        Args:
+            object_name: Tên object client được phép ghi
+            content_type: Content-Type bắt buộc
+            max_size: Kích thước tối đa (bytes)
+            expiry: Thời gian hết hạn (giây)
             
-            # Upload file
-            self.client.put_object(
+        Returns:
+            {"url": ..., "fields": {...}} để client gửi multipart POST, hoặc None nếu thất bại
+        """
+        try:
+            policy = PostPolicy(
                 self.bucket_name,
-                unique_filename,
-                file,
-                length=file.size,
-                content_type=file.content_type
+                datetime.now(timezone.utc) + timedelta(seconds=expiry)
             )
-            
-            # Tạo URL public
-            image_url = f"{settings.MINIO_PUBLIC_URL}/{self.bucket_name}/{unique_filename}"
-            return image_url
-            
+            policy.add_equals_condition("key", object_name)
+            policy.add_equals_condition("Content-Type", content_type)
+            policy.add_content_length_range_condition(1, max_size)
+            with storage_call('presigned_post_policy'):
+                fields = self.client.presigned_post_policy(policy)
+            fields["key"] = object_name
+            fields["Content-Type"] = content_type
+            return {
+                "url": f"{settings.MINIO_PUBLIC_URL}/{self.bucket_name}",
+                "fields": fields,
+            }
+        except (S3Error, ValueError) as e:
+            logger.error("Error generating presigned upload policy: %s", e)
+            return None
+    
+    def stat_image(self, object_name: str):
+        """
+        Lấy metadata của object
+        
+        Returns:
+            minio Object (size, content_type, etag...) hoặc None nếu không tồn tại
+        """
+        try:
+            with storage_call('stat_object'):
+                return self.client.stat_object(self.bucket_name, object_name)
         except S3Error as e:
-            print(f"Error uploading file: {e}")
+            if e.code not in ("NoSuchKey", "NoSuchObject"):
+                logger.error("Error reading object metadata: %s", e)
             return None
     
     def get_presigned_url(self, object_name: str, expiry: int = 3600) -> Optional[str]:
         """
         Tạo presigned URL để download file
         
+        URL đã ký được cache và dùng lại cho tới khi gần hết hạn,
+        nên render nhiều lần cùng một ảnh không phải ký lại mỗi lần.
+        
         Args:
             object_name: Tên object trong bucket
             expiry: Thời gian hết hạn (giây)
@@ -93,15 +429,22 @@ class MinioService:
         Returns:
             Presigned URL hoặc None nếu thất bại
         """
+        cache_key = f"minio:presigned:{self.bucket_name}:{expiry}:{object_name}"
+        url = self.presigned_url_cache.get(cache_key, expiry)
+        if url:
+            return url
+        
         try:
-            url = self.client.presigned_get_object(
-                self.bucket_name,
-                object_name,
-                expires=timedelta(seconds=expiry)
-            )
+            with storage_call('presigned_get_object'):
+                url = self.client.presigned_get_object(
+                    self.bucket_name,
+                    object_name,
+                    expires=timedelta(seconds=expiry)
+                )
+            self.presigned_url_cache.set(cache_key, url, expiry)
             return url
         except S3Error as e:
-            print(f"Error generating presigned URL: {e}")
+            logger.error("Error generating presigned URL: %s", e)
             return None
     
     def delete_image(self, image_url: str) -> bool:
@@ -116,13 +459,49 @@ class MinioService:
         """
         try:
             # Extract object name from URL
-            object_name = image_url.split(f"{self.bucket_name}/")[-1]
-            self.client.remove_object(self.bucket_name, object_name)
+            object_name = self.get_object_name(image_url)
+            with storage_call('remove_object'):
+                self.client.remove_object(self.bucket_name, object_name)
             return True
         except S3Error as e:
-            print(f"Error deleting file: {e}")
+            logger.error("Error deleting file: %s", e)
             return False
+    
+    def delete_objects(self, object_names: list) -> dict:
+        """
+        Xóa nhiều object bằng multi-object delete (tối đa 1000 object mỗi request S3)
+        
+        Args:
+            object_names: Danh sách tên object
+            
+        Returns:
+            {object_name: lỗi} của các object xóa thất bại (rỗng nếu tất cả thành công)
+        """
+        if not object_names:
+            return {}
+        try:
+            # remove_objects là lazy: phải duyệt hết iterator thì request mới được gửi
+            with storage_call('remove_objects'):
+                errors = self.client.remove_objects(
+                    self.bucket_name,
+                    (DeleteObject(name) for name in object_names)
+                )
+                return {error.name: f"{error.code}: {error.message}" for error in errors}
+        except (S3Error, urllib3.exceptions.HTTPError) as e:
+            logger.error("Error deleting files: %s", e)
+            return {name: str(e) for name in object_names}
+    
+    def iter_objects(self, prefix: Optional[str] = None):
+        """
+        Duyệt toàn bộ object trong bucket (streaming theo từng trang listing)
+        
+        Yields:
+            minio Object (object_name, size, last_modified)
+        """
+        for obj in self.client.list_objects(self.bucket_name, prefix=prefix, recursive=True):
+            if not obj.is_dir:
+                yield obj
 
 
-# Singleton instance
+# Singleton instance (client được tạo lazy ở lần dùng đầu tiên)
 minio_service = MinioService()
@@ -0,0 +1,49 @@
+"""
+Signal handlers cho Product
+"""
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_product_cache
+from .changes import record_changes
+from .images import release_image
+from .metrics import install_db_execute_wrapper
+from .profiling import install_sql_capture_wrapper
+from .models import Product, ProductChange
+
+
+@receiver(post_delete, sender=Product)
+def release_deleted_product_image(sender, instance, **kwargs):
+    """
+    Bỏ tham chiếu tới ảnh khi product bị xóa
+
+    Áp dụng cho mọi cách xóa (API, admin, queryset.delete()), ảnh chỉ bị
+    đưa vào hàng đợi xóa khi không còn product nào dùng.
+    """
+    release_image(instance.image, instance.image_variants)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_cached_product_responses(sender, **kwargs):
+    """Mọi thay đổi qua save()/delete() đều làm mất hiệu lực response đã cache"""
+    invalidate_product_cache()
+
+
+@receiver(post_save, sender=Product)
+def record_saved_product_change(sender, instance, created, **kwargs):
+    """Change feed: mọi save() (API, admin, HTML view) đều được ghi lại"""
+    operation = ProductChange.OPERATION_CREATED if created else ProductChange.OPERATION_UPDATED
+    record_changes(operation, [instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def record_deleted_product_change(sender, instance, **kwargs):
+    """Change feed: tombstone cho product bị xóa"""
+    record_changes(ProductChange.OPERATION_DELETED, [instance.pk])
+
+
+# Đo số query/thời gian DB theo request và ghi SQL khi profile (xem products/metrics.py, products/profiling.py)
+connection_created.connect(install_db_execute_wrapper, dispatch_uid='products_metrics_db_wrapper')
+connection_created.connect(install_sql_capture_wrapper, dispatch_uid='products_profiling_sql_capture')
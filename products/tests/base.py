@@ -0,0 +1,59 @@
+import io
+
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from products.models import Product
+from products.services import minio_service
+from products.tests.fake_minio import FakeMinioClient
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'products': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'products-tests'},
+}
+
+
+def make_image(image_format='PNG', color=(255, 0, 0), size=(64, 48)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def image_upload(name='photo.png', data=None):
+    """File ảnh cho multipart request của APIClient"""
+    file = io.BytesIO(make_image() if data is None else data)
+    file.name = name
+    return file
+
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    PRODUCT_CACHE_ENABLED=False,
+    PRODUCT_IMAGE_DELETE_AUTO_DRAIN=False,
+    PRODUCT_OUTBOX_AUTO_DISPATCH=False,
+    PRODUCT_WEBHOOK_URLS=[],
+    # Không sinh derivative (process pool) trong các test upload
+    PRODUCT_IMAGE_VARIANT_WIDTHS=[],
+)
+class ProductTestCase(TestCase):
+    """Base test: MinIO giả lập in-process, không background thread/process"""
+    client_class = APIClient
+
+    def setUp(self):
+        original_client, original_checked = minio_service._client, minio_service._bucket_checked
+        self.minio = FakeMinioClient()
+        minio_service.client = self.minio
+        minio_service.presigned_url_cache.clear()
+
+        def restore():
+            minio_service._client, minio_service._bucket_checked = original_client, original_checked
+        self.addCleanup(restore)
+
+    def create_products(self, count, **fields):
+        defaults = {'description': 'Mô tả', 'image': '', 'post_id': '', 'status': False}
+        defaults.update(fields)
+        return Product.objects.bulk_create([
+            Product(name=f'Sản phẩm {i}', price=(i + 1) * 1000, **defaults)
+            for i in range(count)
+        ])
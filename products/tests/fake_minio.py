@@ -0,0 +1,111 @@
+"""
+Fake MinIO client chạy in-process cho test và benchmark
+
+Cài vào `minio_service.client` để chạy API ảnh mà không phụ thuộc MinIO thật. Benchmark
+truyền `latency` (giây) để giả lập round-trip mạng cho mỗi lời gọi.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from minio.error import S3Error
+
+
+class FakeObjectResponse:
+    """Giống urllib3 response mà `Minio.get_object` trả về"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def read(self) -> bytes:
+        return self.data
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class FakeMinioClient:
+    """Lưu object trong dict, hỗ trợ các method MinioService dùng"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _not_found(self, bucket_name, object_name):
+        return S3Error(
+            'NoSuchKey', 'Object does not exist', object_name, 'fake', 'fake', None,
+            bucket_name=bucket_name, object_name=object_name
+        )
+
+    def bucket_exists(self, bucket_name):
+        return True
+
+    def make_bucket(self, bucket_name, *args, **kwargs):
+        pass
+
+    def set_bucket_policy(self, bucket_name, policy):
+        pass
+
+    def put_object(self, bucket_name, object_name, data, length=-1, content_type='application/octet-stream', **kwargs):
+        self._wait()
+        content = data.read()
+        with self.lock:
+            self.objects[object_name] = (content, content_type, datetime.now(timezone.utc))
+        return SimpleNamespace(bucket_name=bucket_name, object_name=object_name, etag='fake')
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0, **kwargs):
+        self._wait()
+        with self.lock:
+            if object_name not in self.objects:
+                raise self._not_found(bucket_name, object_name)
+            content = self.objects[object_name][0]
+        return FakeObjectResponse(content[offset:offset + length] if length else content[offset:])
+
+    def stat_object(self, bucket_name, object_name, *args, **kwargs):
+        self._wait()
+        with self.lock:
+            if object_name not in self.objects:
+                raise self._not_found(bucket_name, object_name)
+            content, content_type, last_modified = self.objects[object_name]
+        return SimpleNamespace(
+            bucket_name=bucket_name, object_name=object_name, size=len(content),
+            content_type=content_type, last_modified=last_modified, etag='fake'
+        )
+
+    def remove_object(self, bucket_name, object_name, *args, **kwargs):
+        self._wait()
+        with self.lock:
+            self.objects.pop(object_name, None)
+
+    def remove_objects(self, bucket_name, delete_object_list, *args, **kwargs):
+        self._wait()
+        with self.lock:
+            for delete_object in delete_object_list:
+                self.objects.pop(delete_object._name, None)
+        return iter([])
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, **kwargs):
+        with self.lock:
+            items = list(self.objects.items())
+        for object_name, (content, _, last_modified) in items:
+            if prefix and not object_name.startswith(prefix):
+                continue
+            yield SimpleNamespace(
+                object_name=object_name, size=len(content),
+                last_modified=last_modified, is_dir=False
+            )
+
+    def presigned_get_object(self, bucket_name, object_name, expires=None, **kwargs):
+        return f"http://fake-minio/{bucket_name}/{object_name}?X-Amz-Signature=fake"
+
+    def presigned_post_policy(self, policy):
+        return {'key': 'fake', 'policy': 'fake', 'x-amz-signature': 'fake'}
@@ -0,0 +1,17 @@
+from asgiref.sync import sync_to_async
+
+from products.tests.base import ProductTestCase
+
+
+class AsyncViewTests(ProductTestCase):
+    async def test_async_list_pages_with_after(self):
+        products = await sync_to_async(self.create_products)(3)
+        first = (await self.async_client.get('/api/async/products/', {'page_size': 2})).json()
+        second = (await self.async_client.get('/api/async/products/', {'page_size': 2, 'after': products[1].id})).json()
+        detail = (await self.async_client.get(f'/api/async/products/{products[0].id}/')).json()
+
+        self.assertEqual([row['id'] for row in first['results']], [products[0].id, products[1].id])
+        self.assertIn(f'after={products[1].id}', first['next'])
+        self.assertEqual([row['id'] for row in second['results']], [products[2].id])
+        self.assertIsNone(second['next'])
+        self.assertEqual(detail['name'], 'Sản phẩm 0')
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase
+
+from products.benchmarks.runner import BenchmarkRunner, percentile
+from products.tests.base import ProductTestCase
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        # Rank là ceil(p/100 * n): round() làm tròn 2.5 xuống 2
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(percentile(list(range(1, 11)), 41), 5)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+class BenchmarkRunnerTests(ProductTestCase):
+    def test_cached_and_uncached_runs_are_reported_separately(self):
+        runner = BenchmarkRunner(requests=3, warmup=1)
+        results = runner.run([5], only={'list_page'}, cache_modes=(False, True))
+        self.assertEqual([(row['scenario'], row['cache']) for row in results], [
+            ('list_page', False), ('list_page', True)
+        ])
+        self.assertGreater(results[0]['queries_per_request'], results[1]['queries_per_request'])
+        self.assertEqual([row['errors'] for row in results], [0, 0])
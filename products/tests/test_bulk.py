@@ -0,0 +1,30 @@
+from products.models import Product
+from products.tests.base import ProductTestCase
+
+
+class BulkEndpointTests(ProductTestCase):
+    def test_bulk_create_is_all_or_nothing(self):
+        response = self.client.post('/api/products/bulk/', [
+            {'name': 'A', 'price': 1000, 'description': 'a'},
+            {'name': 'B', 'price': 0, 'description': 'b'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(Product.objects.exists())
+
+        response = self.client.post('/api/products/bulk/', [
+            {'name': 'A', 'price': 1000, 'description': 'a'},
+            {'name': 'B', 'price': 2000, 'description': 'b'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(list(Product.objects.order_by('id').values_list('id', flat=True)), response.data['ids'])
+
+    def test_bulk_update_post_id_reports_missing_ids(self):
+        product = self.create_products(1, claimed_by='w1')[0]
+        response = self.client.patch('/api/products/bulk-update-post-id/', {
+            'items': [{'id': product.id, 'post_id': 'p-1'}, {'id': product.id + 100, 'post_id': 'p-2'}]
+        }, format='json')
+        self.assertEqual(response.data, {'updated': [product.id], 'missing': [product.id + 100]})
+        product.refresh_from_db()
+        self.assertEqual((product.post_id, product.status, product.claimed_by), ('p-1', True, ''))
@@ -0,0 +1,30 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from products.cache import _bump_version, current_version, get_cache
+from products.models import Product
+from products.tests.base import ProductTestCase
+
+
+@override_settings(PRODUCT_CACHE_ENABLED=True)
+class ResponseCacheTests(ProductTestCase):
+    def test_write_invalidates_cached_list(self):
+        self.create_products(1)
+        self.assertEqual(self.client.get('/api/products/').data['count'], 1)
+        Product.objects.all().update(name='Đã đổi')
+        # Response vẫn lấy từ cache khi chưa có thao tác ghi nào invalidate
+        self.assertEqual(self.client.get('/api/products/').data['results'][0]['name'], 'Sản phẩm 0')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/products/', {'name': 'Mới', 'price': 1000, 'description': 'x'}, format='json')
+        self.assertEqual(self.client.get('/api/products/').data['count'], 2)
+
+    def test_bump_writes_a_fresh_token_without_incr(self):
+        versions = {current_version()}
+        # incr của file/locmem cache không nguyên tử giữa các worker
+        with mock.patch.object(type(get_cache()), 'incr', side_effect=AssertionError):
+            for _ in range(3):
+                _bump_version()
+                versions.add(current_version())
+        self.assertEqual(len(versions), 4)
@@ -0,0 +1,73 @@
+import io
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+
+from products.changes import compact_changes, format_cursor, parse_cursor, read_changes
+from products.models import Product, ProductChange
+from products.tests.base import ProductTestCase
+
+
+class ChangeFeedTests(ProductTestCase):
+    def test_feed_returns_current_state_and_tombstones(self):
+        response = self.client.post('/api/products/bulk/', [
+            {'name': 'A', 'price': 1000, 'description': 'a'},
+            {'name': 'B', 'price': 2000, 'description': 'b'},
+        ], format='json')
+        first_id, second_id = response.data['ids']
+        Product.objects.get(id=first_id).delete()
+
+        response = self.client.get('/api/products/changes/', {'since': 0})
+        results = {result['id']: result for result in response.data['results']}
+        self.assertEqual(results[first_id]['op'], ProductChange.OPERATION_DELETED)
+        self.assertIsNone(results[first_id]['data'])
+        self.assertEqual(results[second_id]['data']['name'], 'B')
+
+        response = self.client.get('/api/products/changes/', {'since': response.data['next_since']})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(self.client.get('/api/products/changes/', {'since': 'abc'}).status_code, 400)
+
+    def test_change_committed_late_is_not_skipped(self):
+        first, second = self.create_products(2)
+        # Transaction 100 ghi change trước (id nhỏ hơn) nhưng commit sau transaction 90
+        late = ProductChange.objects.create(product_id=first.id, operation=ProductChange.OPERATION_UPDATED, txid=100)
+        early = ProductChange.objects.create(product_id=second.id, operation=ProductChange.OPERATION_UPDATED, txid=90)
+        self.assertLess(late.id, early.id)
+
+        with mock.patch('products.changes.committed_txid_horizon', return_value=95):
+            results, cursor, _ = read_changes((0, 0), 10)
+        self.assertEqual([result['change_id'] for result in results], [early.id])
+
+        results, cursor, _ = read_changes(cursor, 10)
+        self.assertEqual([result['change_id'] for result in results], [late.id])
+
+    def test_integer_cursor_is_still_accepted(self):
+        self.assertEqual(parse_cursor('812'), (0, 812))
+        self.assertEqual(parse_cursor(format_cursor((48213, 812))), (48213, 812))
+        with self.assertRaises(ValueError):
+            parse_cursor('-1')
+
+    @skipUnless(connection.vendor == 'postgresql', 'txid chỉ được gán bởi trigger trên Postgres')
+    def test_changes_record_the_writing_transaction(self):
+        product = self.create_products(1)[0]
+        product.save()
+        change = ProductChange.objects.get()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_current_xact_id()::text::bigint')
+            self.assertEqual(change.txid, cursor.fetchone()[0])
+
+    def test_compaction_keeps_latest_change_per_product(self):
+        product = self.create_products(1)[0]
+        product.save()
+        product.save()
+        self.assertEqual(compact_changes(), 1)
+        self.assertEqual(ProductChange.objects.filter(product_id=product.id).count(), 1)
+        results, _, _ = read_changes((0, 0), 10)
+        self.assertEqual([result['op'] for result in results], [ProductChange.OPERATION_UPDATED])
+
+    def test_compact_command(self):
+        product = self.create_products(1)[0]
+        product.save()
+        call_command('compact_product_changes', stdout=io.StringIO())
+        self.assertEqual(ProductChange.objects.count(), 1)
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from products.models import Product
+from products.tests.base import ProductTestCase
+
+
+class ClaimPendingTests(ProductTestCase):
+    def test_claim_leases_distinct_products_and_release_frees_them(self):
+        self.create_products(3)
+        first = self.client.post('/api/products/pending/claim/', {'worker_id': 'w1', 'limit': 2}, format='json')
+        second = self.client.post('/api/products/pending/claim/', {'worker_id': 'w2', 'limit': 2}, format='json')
+        first_ids = [row['id'] for row in first.data['results']]
+        second_ids = [row['id'] for row in second.data['results']]
+        self.assertEqual(len(first_ids), 2)
+        self.assertEqual(len(second_ids), 1)
+        self.assertFalse(set(first_ids) & set(second_ids))
+
+        # Chỉ worker đang giữ lease mới release được
+        response = self.client.post('/api/products/pending/release/', {'worker_id': 'w2', 'ids': first_ids}, format='json')
+        self.assertEqual(response.data['released'], [])
+        response = self.client.post('/api/products/pending/release/', {'worker_id': 'w1', 'ids': first_ids}, format='json')
+        self.assertEqual(response.data['released'], sorted(first_ids))
+        self.assertFalse(Product.objects.filter(id__in=first_ids).exclude(claimed_by='').exists())
+
+    def test_expired_lease_can_be_claimed_again(self):
+        product = self.create_products(1, claimed_by='w1', lease_expires_at=timezone.now() - timedelta(seconds=1))[0]
+        response = self.client.post('/api/products/pending/claim/', {'worker_id': 'w2'}, format='json')
+        self.assertEqual([row['id'] for row in response.data['results']], [product.id])
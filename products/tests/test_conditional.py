@@ -0,0 +1,41 @@
+import time
+
+from django.utils.http import http_date
+
+from products.tests.base import ProductTestCase
+
+
+class ConditionalGetTests(ProductTestCase):
+    def test_unchanged_list_returns_304(self):
+        self.create_products(2)
+        response = self.client.get('/api/products/pending/')
+        response = self.client.get('/api/products/pending/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_delete_changes_list_etag(self):
+        products = self.create_products(2)
+        etag = self.client.get('/api/products/pending/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            products[0].delete()
+        response = self.client.get('/api/products/pending/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_list_ignores_if_modified_since_after_delete(self):
+        products = self.create_products(2)
+        response = self.client.get('/api/products/pending/')
+        self.assertNotIn('Last-Modified', response)
+        with self.captureOnCommitCallbacks(execute=True):
+            products[1].delete()
+        # Max(updated_at) không đổi khi xóa, chỉ ETag mới phát hiện được
+        response = self.client.get('/api/products/pending/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_retrieve_etag_follows_updated_at(self):
+        product = self.create_products(1)[0]
+        etag = self.client.get(f'/api/products/{product.id}/')['ETag']
+        self.assertEqual(self.client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        product.save()
+        self.assertEqual(self.client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertIn('Last-Modified', self.client.get(f'/api/products/{product.id}/'))
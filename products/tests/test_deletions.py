@@ -0,0 +1,56 @@
+import io
+from unittest import mock
+
+from django.db import connection
+from django.utils import timezone
+
+from products.deletions import (
+    cancel_object_deletions,
+    claim_deletions,
+    drain_object_deletions,
+    enqueue_object_deletions,
+)
+from products.models import PendingObjectDeletion, StoredImage
+from products.tests.base import ProductTestCase
+
+
+class ObjectDeletionTests(ProductTestCase):
+    def test_deletion_queue_is_drained_in_batches(self):
+        for name in ('a.png', 'b.png', 'reused.png'):
+            self.minio.put_object('products', name, io.BytesIO(b'x'))
+        enqueue_object_deletions(['a.png', 'b.png', 'reused.png'])
+        StoredImage.objects.create(object_name='reused.png', ref_count=1)
+
+        self.assertEqual(drain_object_deletions(batch_size=2), {'deleted': 2, 'failed': 0})
+        self.assertEqual(list(self.minio.objects), ['reused.png'])
+        self.assertFalse(PendingObjectDeletion.objects.exists())
+
+    def test_batch_is_leased_and_deleted_outside_a_transaction(self):
+        self.minio.put_object('products', 'a.png', io.BytesIO(b'x'))
+        enqueue_object_deletions(['a.png'])
+        depth = len(connection.atomic_blocks)
+
+        def delete_objects(object_names):
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            # Drainer khác không lấy được object đang xóa
+            self.assertEqual(claim_deletions(10), [])
+            return {}
+
+        with mock.patch('products.deletions.minio_service.delete_objects', side_effect=delete_objects):
+            self.assertEqual(drain_object_deletions(), {'deleted': 1, 'failed': 0})
+        self.assertFalse(PendingObjectDeletion.objects.exists())
+
+    def test_failed_deletion_releases_the_lease(self):
+        enqueue_object_deletions(['a.png'])
+        with mock.patch('products.deletions.minio_service.delete_objects', return_value={'a.png': 'boom'}):
+            self.assertEqual(drain_object_deletions(), {'deleted': 0, 'failed': 1})
+        pending = PendingObjectDeletion.objects.get()
+        self.assertEqual((pending.attempts, pending.last_error, pending.leased_until), (1, 'boom', None))
+
+    def test_cancel_skips_expired_lease(self):
+        enqueue_object_deletions(['a.png', 'a_200.webp'])
+        # Drainer chết sau khi lease batch
+        self.assertEqual(len(claim_deletions(10)), 2)
+        PendingObjectDeletion.objects.update(leased_until=timezone.now())
+        cancel_object_deletions('a.png')
+        self.assertFalse(PendingObjectDeletion.objects.exists())
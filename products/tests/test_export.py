@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+
+from products.tests.base import ProductTestCase
+
+
+class ExportTests(ProductTestCase):
+    def test_streams_ndjson_and_csv(self):
+        self.create_products(3)
+        response = self.client.get('/api/products/export/', {'fields': 'id,name'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['Sản phẩm 0', 'Sản phẩm 1', 'Sản phẩm 2'])
+
+        response = self.client.get('/api/products/export/', {'output': 'csv', 'fields': 'id,price'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,price')
+        self.assertEqual(len(lines), 4)
+
+    def test_csv_datetimes_match_ndjson(self):
+        self.create_products(1)
+        response = self.client.get('/api/products/export/', {'fields': 'id,updated_at'})
+        updated_at = json.loads(b''.join(response.streaming_content))['updated_at']
+        response = self.client.get('/api/products/export/', {'output': 'csv', 'fields': 'id,updated_at'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0]['updated_at'], updated_at)
+        self.assertIn('T', updated_at)
+
+    async def test_export_streams_under_asgi(self):
+        await sync_to_async(self.create_products)(2)
+        response = await self.async_client.get('/api/products/export/', {'fields': 'id,name'})
+        # Iterator async: Django không gom cả response vào list trước khi gửi
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 2)
@@ -0,0 +1,13 @@
+import json
+
+from products.models import Product
+from products.serializers import ProductListSerializer
+from products.tests.base import ProductTestCase
+
+
+class ListFastPathTests(ProductTestCase):
+    def test_values_fast_path_matches_serializer(self):
+        self.create_products(2, image_variants={'200': {'webp': 'http://x/a_200.webp'}})
+        response = self.client.get('/api/products/')
+        expected = ProductListSerializer(Product.objects.order_by('id'), many=True).data
+        self.assertEqual(json.loads(response.content)['results'], json.loads(json.dumps(expected)))
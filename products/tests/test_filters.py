@@ -0,0 +1,9 @@
+from products.tests.base import ProductTestCase
+
+
+class FilterOrderingTests(ProductTestCase):
+    def test_filters_and_ordering(self):
+        self.create_products(4)
+        response = self.client.get('/api/products/', {'price_min': 2000, 'ordering': '-price'})
+        self.assertEqual([row['price'] for row in response.data['results']], [4000, 3000, 2000])
+        self.assertEqual(self.client.get('/api/products/', {'ordering': 'name'}).status_code, 400)
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.utils import timezone
+
+from products.jobs import process_image_upload_job, recover_stale_jobs
+from products.models import ImageUploadJob
+from products.tests.base import ProductTestCase, image_upload
+
+
+class ImageUploadJobTests(ProductTestCase):
+    def test_async_upload_creates_job_processed_by_worker(self):
+        product = self.create_products(1)[0]
+        with mock.patch('products.jobs.get_executor') as get_executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/products/{product.id}/upload-image/?async=true', {'image': image_upload()})
+        self.assertEqual(response.status_code, 202)
+        job = ImageUploadJob.objects.get(id=response.data['id'])
+        get_executor.return_value.submit.assert_called_once_with(process_image_upload_job, job.id)
+
+        with mock.patch('products.jobs.close_old_connections'):
+            process_image_upload_job(job.id)
+        job.refresh_from_db()
+        product.refresh_from_db()
+        self.assertEqual(job.status, ImageUploadJob.STATUS_SUCCEEDED)
+        self.assertEqual(product.image, job.image)
+
+        response = self.client.get(f'/api/products/upload-jobs/{job.id}/')
+        self.assertEqual(response.data['status'], ImageUploadJob.STATUS_SUCCEEDED)
+
+    def test_recover_reruns_stale_jobs_and_fails_lost_files(self):
+        product = self.create_products(1)[0]
+        with mock.patch('products.jobs.get_executor'):
+            response = self.client.post(f'/api/products/{product.id}/upload-image/?async=true', {'image': image_upload()})
+        job = ImageUploadJob.objects.get(id=response.data['id'])
+        lost = ImageUploadJob.objects.create(
+            product=product, file_path='/nonexistent/job.png', file_name='job.png',
+            content_type='image/png', file_size=1, status=ImageUploadJob.STATUS_PROCESSING,
+            started_at=timezone.now()
+        )
+
+        self.assertEqual(recover_stale_jobs(stale_seconds=600), {'retried': 0, 'failed': 0})
+        self.assertEqual(recover_stale_jobs(stale_seconds=0), {'retried': 1, 'failed': 1})
+        job.refresh_from_db()
+        lost.refresh_from_db()
+        self.assertEqual(job.status, ImageUploadJob.STATUS_SUCCEEDED)
+        self.assertEqual(lost.status, ImageUploadJob.STATUS_FAILED)
@@ -0,0 +1,14 @@
+import io
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from products.imaging import render_variant
+from products.tests.base import make_image
+
+
+class ImageVariantTests(SimpleTestCase):
+    def test_render_variant_resizes_to_width(self):
+        data = render_variant(make_image(size=(800, 600)), 200, 'webp')
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (200, 150)))
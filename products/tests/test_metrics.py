@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from products.metrics import DB_QUERIES, REGISTRY, REQUESTS
+from products.tests.base import ProductTestCase, image_upload
+
+
+@override_settings(PRODUCT_METRICS_TOKEN='secret')
+class MetricsTests(ProductTestCase):
+    def test_requests_and_storage_calls_are_exported(self):
+        product = self.create_products(1)[0]
+        response = self.client.get(f'/api/products/{product.id}/')
+        self.assertIn('app;dur=', response['Server-Timing'])
+        self.client.post(f'/api/products/{product.id}/upload-image/', {'image': image_upload()})
+
+        body = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        self.assertIn('product_api_requests_total{view="product-detail",method="GET",status="200"}', body)
+        self.assertIn('minio_calls_total{operation="put_object",outcome="success"}', body)
+        self.assertIn('minio_calls_total{operation="stat_object",outcome="not_found"}', body)
+
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        staff = User.objects.create_user('ops', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+    def test_sums_snapshots_of_all_workers(self):
+        buckets = len(DB_QUERIES.buckets) + 1
+        with tempfile.TemporaryDirectory() as directory, override_settings(PRODUCT_METRICS_DIR=directory):
+            for worker, count in (('101-a', 3), ('102-b', 2)):
+                with open(os.path.join(directory, f'{worker}.json'), 'w') as file:
+                    json.dump({
+                        REQUESTS.name: [[['other-view', 'GET', '200'], count]],
+                        DB_QUERIES.name: [[['other-view'], [[count] + [0] * (buckets - 1), 0.0]]],
+                    }, file)
+            body = REGISTRY.render()
+            # Snapshot của process hiện tại cũng được ghi vào thư mục
+            self.assertEqual(len(os.listdir(directory)), 3)
+        self.assertIn('product_api_requests_total{view="other-view",method="GET",status="200"} 5', body)
+        self.assertIn('product_api_db_queries_count{view="other-view"} 5', body)
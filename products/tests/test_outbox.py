@@ -0,0 +1,98 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from products.models import OutboxEvent, Product
+from products.outbox import claim_events, dispatch_outbox, product_payload, purge_dead_events
+from products.tests.base import ProductTestCase
+
+
+@override_settings(PRODUCT_WEBHOOK_URLS=['http://hook.test/a'], PRODUCT_OUTBOX_MAX_ATTEMPTS=2)
+class OutboxTests(ProductTestCase):
+    def test_events_are_written_with_the_change_and_deleted_after_delivery(self):
+        response = self.client.post('/api/products/', {'name': 'A', 'price': 1000, 'description': 'a'}, format='json')
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.event_type, event.payload), (OutboxEvent.TYPE_PRODUCT_CREATED, response.data))
+
+        with mock.patch('products.outbox.post_events', return_value='') as post_events:
+            self.assertEqual(dispatch_outbox(), {'sent': 1, 'failed': 0})
+        post_events.assert_called_once()
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_bulk_post_id_update_sends_the_same_payload_as_single_update(self):
+        first, second = self.create_products(2)
+        self.client.patch(f'/api/products/{first.id}/update-post-id/', {'post_id': 'p-1'}, format='json')
+        self.client.patch('/api/products/bulk-update-post-id/', {
+            'items': [{'id': second.id, 'post_id': 'p-2'}]
+        }, format='json')
+
+        single, bulk = OutboxEvent.objects.order_by('id')
+        self.assertEqual(set(bulk.payload), set(single.payload))
+        self.assertEqual(bulk.payload, product_payload(Product.objects.get(id=second.id)))
+
+    def test_batch_is_leased_and_posted_outside_a_transaction(self):
+        self.client.post('/api/products/', {'name': 'A', 'price': 1000, 'description': 'a'}, format='json')
+        depth = len(connection.atomic_blocks)
+
+        def post_events(url, events):
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            # Dispatcher khác không lấy được event đang gửi
+            self.assertEqual(claim_events(10), [])
+            return ''
+
+        with mock.patch('products.outbox.post_events', side_effect=post_events):
+            self.assertEqual(dispatch_outbox(), {'sent': 1, 'failed': 0})
+
+    def test_expired_lease_is_dispatched_again(self):
+        self.client.post('/api/products/', {'name': 'A', 'price': 1000, 'description': 'a'}, format='json')
+        # Dispatcher chết sau khi lease batch
+        self.assertEqual(len(claim_events(10)), 1)
+        with mock.patch('products.outbox.post_events', return_value=''):
+            self.assertEqual(dispatch_outbox(), {'sent': 0, 'failed': 0})
+            OutboxEvent.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(dispatch_outbox(), {'sent': 1, 'failed': 0})
+
+    def test_failed_delivery_backs_off_then_stops(self):
+        self.client.post('/api/products/', {'name': 'A', 'price': 1000, 'description': 'a'}, format='json')
+        with mock.patch('products.outbox.post_events', return_value='HTTP 500'):
+            self.assertEqual(dispatch_outbox(), {'sent': 0, 'failed': 1})
+            event = OutboxEvent.objects.get()
+            self.assertEqual(event.attempts, 1)
+            self.assertGreater(event.next_attempt_at, timezone.now())
+            # Chưa tới hạn retry
+            self.assertEqual(dispatch_outbox(), {'sent': 0, 'failed': 0})
+
+            OutboxEvent.objects.update(next_attempt_at=timezone.now())
+            dispatch_outbox()
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 2)
+        self.assertIsNone(event.next_attempt_at)
+
+    def test_dead_events_can_be_requeued_or_purged(self):
+        self.client.post('/api/products/', {'name': 'A', 'price': 1000, 'description': 'a'}, format='json')
+        OutboxEvent.objects.update(attempts=2, next_attempt_at=None, last_error='HTTP 500')
+
+        out = io.StringIO()
+        with mock.patch('products.outbox.post_events', return_value=''):
+            call_command('dispatch_outbox', stdout=out)
+            self.assertIn('0 failed, 1 dead', out.getvalue())
+            call_command('dispatch_outbox', '--requeue-dead', stdout=out)
+        self.assertIn('Requeued 1 dead event(s)', out.getvalue())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+        self.client.post('/api/products/', {'name': 'B', 'price': 1000, 'description': 'b'}, format='json')
+        OutboxEvent.objects.update(next_attempt_at=None)
+        self.assertEqual(purge_dead_events(), 1)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_admin_lists_dead_events(self):
+        self.client.post('/api/products/', {'name': 'A', 'price': 1000, 'description': 'a'}, format='json')
+        OutboxEvent.objects.update(next_attempt_at=None, last_error='HTTP 500')
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        response = self.client.get('/admin/products/outboxevent/', {'dead': '1'})
+        self.assertContains(response, 'product.created')
@@ -0,0 +1,20 @@
+from products.models import Product
+from products.tests.base import ProductTestCase
+
+
+class CursorPaginationTests(ProductTestCase):
+    def test_pages_through_list_without_count(self):
+        self.create_products(5)
+        response = self.client.get('/api/products/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        ids = [row['id'] for row in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [row['id'] for row in response.data['results']]
+        self.assertEqual(ids, sorted(Product.objects.values_list('id', flat=True)))
+
+    def test_legacy_format_without_page_size(self):
+        self.create_products(3)
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data['count'], 3)
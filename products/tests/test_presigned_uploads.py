@@ -0,0 +1,56 @@
+import io
+from unittest import mock
+
+from products.models import PendingObjectDeletion
+from products.services import minio_service
+from products.tests.base import ProductTestCase, make_image
+
+
+class PresignedUploadTests(ProductTestCase):
+    def test_presigned_upload_is_attached_on_complete(self):
+        product = self.create_products(1)[0]
+        response = self.client.post(f'/api/products/{product.id}/upload-image/presign/', {
+            'filename': 'photo.png', 'content_type': 'image/png'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        object_name = response.data['fields']['key']
+        token = response.data['upload_token']
+
+        response = self.client.post(f'/api/products/{product.id}/upload-image/complete/', {'upload_token': token}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        minio_service.client.put_object('products', object_name, io.BytesIO(make_image()), content_type='image/png')
+        response = self.client.post(f'/api/products/{product.id}/upload-image/complete/', {'upload_token': token}, format='json')
+        self.assertEqual(response.status_code, 200)
+        product.refresh_from_db()
+        self.assertTrue(product.image.endswith(object_name))
+
+    def presign(self, product, filename='photo.png', content_type='image/png'):
+        response = self.client.post(f'/api/products/{product.id}/upload-image/presign/', {
+            'filename': filename, 'content_type': content_type
+        }, format='json')
+        return response.data['fields']['key'], response.data['upload_token']
+
+    def test_complete_rejects_and_deletes_object_that_is_not_an_image(self):
+        product = self.create_products(1)[0]
+        object_name, token = self.presign(product)
+        # Content-Type do client khai báo, nội dung không phải ảnh
+        minio_service.client.put_object('products', object_name, io.BytesIO(b'<html></html>'), content_type='image/png')
+
+        response = self.client.post(f'/api/products/{product.id}/upload-image/complete/', {'upload_token': token}, format='json')
+        self.assertEqual(response.status_code, 400)
+        product.refresh_from_db()
+        self.assertEqual(product.image, '')
+        self.assertEqual(list(PendingObjectDeletion.objects.values_list('object_name', flat=True)), [object_name])
+
+    def test_complete_reads_only_the_head_of_the_object(self):
+        product = self.create_products(1)[0]
+        object_name, token = self.presign(product, 'photo.jpg', 'image/jpeg')
+        # Ảnh PNG nhưng được upload dưới tên .jpg
+        minio_service.client.put_object('products', object_name, io.BytesIO(make_image()), content_type='image/jpeg')
+
+        with mock.patch.object(self.minio, 'get_object', wraps=self.minio.get_object) as get_object:
+            response = self.client.post(f'/api/products/{product.id}/upload-image/complete/', {'upload_token': token}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(get_object.call_args.kwargs['length'], 64 * 1024)
+        self.assertTrue(PendingObjectDeletion.objects.filter(object_name=object_name).exists())
@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+
+from products.tests.base import ProductTestCase
+
+
+@override_settings(PRODUCT_PROFILING_ENABLED=True, PRODUCT_PROFILING_TOKEN='secret')
+class ProfilingTests(ProductTestCase):
+    def test_inline_report_requires_token(self):
+        self.create_products(1)
+        response = self.client.get('/api/products/', {'_profile': 'inline'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        response = self.client.get('/api/products/', {'_profile': 'inline'}, HTTP_X_PROFILE_TOKEN='secret')
+        report = response.content.decode()
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn('products_product', report)
+        self.assertIn('views.py', report)
+
+    async def test_asgi_report_includes_sync_view(self):
+        await sync_to_async(self.create_products)(1)
+        response = await self.async_client.get(
+            '/api/products/', {'_profile': 'inline'}, headers={'X-Profile-Token': 'secret'}
+        )
+        report = response.content.decode()
+        self.assertIn('products_product', report)
+        # View sync chạy trong thread khác với event loop
+        self.assertIn('views.py', report)
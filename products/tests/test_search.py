@@ -0,0 +1,10 @@
+from products.models import Product
+from products.tests.base import ProductTestCase
+
+
+class SearchTests(ProductTestCase):
+    def test_search_by_name(self):
+        self.create_products(2)
+        Product.objects.create(name='iPhone 15', price=1000, description='Điện thoại', image='', post_id='')
+        response = self.client.get('/api/products/', {'q': 'iphone'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['iPhone 15'])
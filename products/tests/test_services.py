@@ -0,0 +1,20 @@
+from unittest import mock
+
+from products.services import MinioService
+from products.services import minio_service
+from products.tests.base import ProductTestCase
+
+
+class MinioServiceTests(ProductTestCase):
+    def test_client_is_created_lazily(self):
+        service = MinioService()
+        with mock.patch.object(MinioService, '_create_client') as create_client:
+            self.assertIsNone(service._client)
+            create_client.assert_not_called()
+
+    def test_presigned_url_is_reused_until_near_expiry(self):
+        with mock.patch.object(self.minio, 'presigned_get_object', wraps=self.minio.presigned_get_object) as sign:
+            first = minio_service.get_presigned_url('a.png', expiry=3600)
+            second = minio_service.get_presigned_url('a.png', expiry=3600)
+        self.assertEqual(first, second)
+        self.assertEqual(sign.call_count, 1)
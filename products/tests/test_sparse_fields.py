@@ -0,0 +1,11 @@
+from products.tests.base import ProductTestCase
+
+
+class SparseFieldsetTests(ProductTestCase):
+    def test_fields_and_exclude(self):
+        self.create_products(1)
+        response = self.client.get('/api/products/', {'fields': 'id,name'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+        response = self.client.get('/api/products/', {'exclude': 'description'})
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertEqual(self.client.get('/api/products/', {'fields': 'password'}).status_code, 400)
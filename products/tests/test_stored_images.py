@@ -0,0 +1,25 @@
+from products.models import PendingObjectDeletion, StoredImage
+from products.tests.base import ProductTestCase, image_upload
+
+
+class StoredImageTests(ProductTestCase):
+    def test_same_content_is_stored_once_and_released_by_refcount(self):
+        first, second = self.create_products(2)
+        response = self.client.post(f'/api/products/{first.id}/upload-image/', {'image': image_upload()})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['deduplicated'])
+        response = self.client.post(f'/api/products/{second.id}/upload-image/', {'image': image_upload('copy.png')})
+        self.assertTrue(response.data['deduplicated'])
+
+        stored = StoredImage.objects.get()
+        self.assertEqual(stored.ref_count, 2)
+        self.assertEqual(list(self.minio.objects), [stored.object_name])
+
+        self.client.delete(f'/api/products/{first.id}/')
+        stored.refresh_from_db()
+        self.assertEqual(stored.ref_count, 1)
+        self.assertFalse(PendingObjectDeletion.objects.exists())
+
+        self.client.delete(f'/api/products/{second.id}/')
+        self.assertFalse(StoredImage.objects.exists())
+        self.assertEqual(list(PendingObjectDeletion.objects.values_list('object_name', flat=True)), [stored.object_name])
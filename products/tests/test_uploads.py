@@ -0,0 +1,40 @@
+import hashlib
+
+from products.tests.base import ProductTestCase, image_upload, make_image
+
+
+class UploadHandlerTests(ProductTestCase):
+    def test_hash_is_computed_while_streaming(self):
+        product = self.create_products(1)[0]
+        data = make_image()
+        response = self.client.post(f'/api/products/{product.id}/upload-image/', {'image': image_upload(data=data)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(hashlib.sha256(data).hexdigest(), response.data['image'])
+
+    def test_rejects_non_images_and_mismatched_extension(self):
+        product = self.create_products(1)[0]
+        response = self.client.post(f'/api/products/{product.id}/upload-image/', {'image': image_upload(data=b'not an image at all')})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+
+        response = self.client.post(f'/api/products/{product.id}/upload-image/', {
+            'image': image_upload('photo.jpg', make_image())
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_file_pillow_cannot_decode(self):
+        product = self.create_products(1)[0]
+        # Magic bytes PNG hợp lệ nhưng nội dung hỏng
+        data = b'\x89PNG\r\n\x1a\n' + b'\0' * 100
+        response = self.client.post(f'/api/products/{product.id}/upload-image/', {'image': image_upload(data=data)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+        self.assertFalse(self.minio.objects)
+
+    def test_rejects_oversize_file(self):
+        product = self.create_products(1)[0]
+        data = make_image() + b'\0' * (5 * 1024 * 1024)
+        response = self.client.post(f'/api/products/{product.id}/upload-image/', {'image': image_upload(data=data)})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'image': ['Kích thước ảnh không được vượt quá 5MB']})
+        self.assertFalse(self.minio.objects)
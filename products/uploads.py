@@ -0,0 +1,130 @@
+"""
+Upload handler cho upload-image: kiểm tra và hash ảnh ngay trong lúc nhận request
+
+Thay cho MemoryFileUploadHandler/TemporaryFileUploadHandler mặc định: body quá lớn bị
+từ chối ngay từ Content-Length hoặc khi đếm chunk vượt giới hạn, định dạng ảnh được
+nhận diện từ magic bytes của chunk đầu tiên, SHA-256 được tính dần theo từng chunk.
+File giữ trong bộ nhớ (tối đa MAX_IMAGE_SIZE), không ghi ra temp file; khi nhận xong,
+Pillow kiểm tra file từ buffer (như ImageField) nên file chỉ có magic bytes hợp lệ
+cũng bị từ chối. MinioService dùng lại `file.sha256`.
+"""
+import hashlib
+import io
+
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image
+from rest_framework import serializers
+
+from .serializers import MAX_IMAGE_SIZE
+
+# Phần thêm của multipart (boundary, header từng part, field khác) cho phép ngoài file
+MULTIPART_OVERHEAD = 64 * 1024
+# Số byte đầu tiên đủ để nhận diện mọi định dạng hỗ trợ
+SNIFF_LENGTH = 12
+# Số byte đầu của object đọc để Pillow nhận diện ảnh (header + metadata như EXIF)
+IMAGE_HEADER_LENGTH = 64 * 1024
+
+SIZE_ERROR = "Kích thước ảnh không được vượt quá 5MB"
+FORMAT_ERROR = "File không phải ảnh hợp lệ (JPG, PNG, GIF, WEBP)"
+
+
+def sniff_image_format(header: bytes):
+    """Định dạng ảnh ('jpeg', 'png', 'gif', 'webp') theo magic bytes, None nếu không nhận ra"""
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def identify_image_header(header: bytes):
+    """
+    Định dạng ảnh từ phần đầu của file, None nếu không phải ảnh hợp lệ
+
+    Magic bytes và Pillow phải nhận cùng một định dạng. Image.open chỉ parse header
+    (không giải mã pixel) nên không cần toàn bộ file.
+    """
+    image_format = sniff_image_format(header[:SNIFF_LENGTH])
+    if image_format is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(header)) as image:
+            if (image.format or '').lower() != image_format or not all(image.size):
+                return None
+    except Exception:
+        return None
+    return image_format
+
+
+class ImageStreamUploadHandler(FileUploadHandler):
+    """
+    Nhận file ảnh theo từng chunk: giới hạn kích thước, sniff định dạng, hash SHA-256
+
+    Lỗi được raise dưới dạng ValidationError của DRF ({"image": [...]}, 400) giống
+    lỗi của ProductImageUploadSerializer.
+    """
+    chunk_size = 64 * 1024
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > MAX_IMAGE_SIZE + MULTIPART_OVERHEAD:
+            raise serializers.ValidationError({'image': [SIZE_ERROR]})
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.buffer = io.BytesIO()
+        self.hasher = hashlib.sha256()
+        self.header = b''
+        self.image_format = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > MAX_IMAGE_SIZE:
+            raise serializers.ValidationError({'image': [SIZE_ERROR]})
+        if self.image_format is None:
+            self.header += raw_data[:SNIFF_LENGTH]
+            if len(self.header) >= SNIFF_LENGTH:
+                self._sniff()
+        self.hasher.update(raw_data)
+        self.buffer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.image_format is None:
+            # File nhỏ hơn SNIFF_LENGTH byte
+            self._sniff()
+        self._verify()
+        self.buffer.seek(0)
+        uploaded = InMemoryUploadedFile(
+            file=self.buffer,
+            field_name=self.field_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra
+        )
+        uploaded.sha256 = self.hasher.hexdigest()
+        uploaded.image_format = self.image_format
+        return uploaded
+
+    def _sniff(self):
+        self.image_format = sniff_image_format(self.header[:SNIFF_LENGTH])
+        if self.image_format is None:
+            raise serializers.ValidationError({'image': [FORMAT_ERROR]})
+
+    def _verify(self):
+        """Pillow phải giải mã được file và nhận đúng định dạng đã sniff (giống ImageField)"""
+        self.buffer.seek(0)
+        try:
+            with Image.open(self.buffer) as image:
+                image_format = (image.format or '').lower()
+                image.verify()
+        except Exception:
+            raise serializers.ValidationError({'image': [FORMAT_ERROR]})
+        if image_format != self.image_format:
+            raise serializers.ValidationError({'image': [FORMAT_ERROR]})
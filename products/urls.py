@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, ProductHTMLView
+from . import async_views
+from .views import MetricsView, ProductViewSet, ProductHTMLView
 
 # Router cho REST API
 router = DefaultRouter()
@@ -10,6 +11,15 @@ urlpatterns = [
     # HTML view (không phải API)
     path('product/', ProductHTMLView.as_view(), name='product'),
     
+    # Prometheus metrics
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    
     # API endpoints
     path('api/', include(router.urls)),
+    
+    # Async API endpoints (chạy dưới ASGI, xem products/async_views.py)
+    path('api/async/products/', async_views.product_list, name='async-product-list'),
+    path('api/async/products/pending/', async_views.pending_products, name='async-product-pending'),
+    path('api/async/products/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('api/async/products/<int:pk>/upload-image/', async_views.upload_image, name='async-product-upload-image'),
 ]
@@ -1,26 +1,121 @@
-from django.http import HttpResponse
-from django.shortcuts import render, redirect
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import get_object_or_404, render, redirect
 from django.template import loader
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.views import View
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .models import Product
+from .cache import cached_response, invalidate_product_cache
+from .changes import format_cursor, iter_changes_ndjson, parse_cursor, read_changes, record_changes
+from .conditional import conditional_response, object_version, queryset_version
+from .export import iter_csv, iter_ndjson, streaming_response
+from .filters import ProductFilter, ProductOrderingFilter, ProductSearchFilter
+from .deletions import enqueue_object_deletions
+from .images import (
+    attach_uploaded_object,
+    check_uploaded_image,
+    create_upload_token,
+    read_upload_token,
+    replace_product_image,
+    storage_stats,
+)
+from .jobs import enqueue_image_upload
+from .metrics import REGISTRY
+from .models import ImageUploadJob, OutboxEvent, Product, ProductChange
+from .outbox import enqueue_event, enqueue_events, product_payload
+from .pagination import ProductCursorPagination, ProductSearchPagination
+from .renderers import ORJSONRenderer
 from .serializers import (
     ProductSerializer,
     ProductCreateSerializer,
     ProductImageUploadSerializer,
+    ProductImagePresignSerializer,
+    ProductImageCompleteSerializer,
     ProductUpdateDescriptionSerializer,
     ProductUpdatePostIdSerializer,
     ProductListSerializer,
+    ProductClaimSerializer,
+    ProductReleaseSerializer,
+    ProductBulkUpdatePostIdSerializer,
+    ImageUploadJobSerializer,
+    IMAGE_CONTENT_TYPES,
+    MAX_IMAGE_SIZE,
+    parse_sparse_fields,
+    ValuesRepresentation,
 )
 from .services import minio_service
+from .uploads import ImageStreamUploadHandler
+
+
+# Query params cho chế độ cursor pagination (list và pending)
+cursor_pagination_parameters = [
+    openapi.Parameter(
+        'cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Cursor trang tiếp theo/trước đó (lấy từ `next`/`previous`)'
+    ),
+    openapi.Parameter(
+        'page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+        description='Số sản phẩm mỗi trang (bật chế độ cursor pagination)'
+    ),
+]
+
+# Query params cho full-text search (list)
+search_parameters = [
+    openapi.Parameter(
+        'q', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Tìm kiếm theo tên và mô tả (match prefix, sắp xếp theo độ liên quan). '
+                    'Khi có `q`, kết quả phân trang theo `page`/`page_size`'
+    ),
+    openapi.Parameter(
+        'page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+        description='Trang kết quả search (chỉ dùng cùng `q`)'
+    ),
+]
+
+# Query params lọc và sắp xếp (list)
+filter_parameters = [
+    openapi.Parameter('price_min', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Giá tối thiểu'),
+    openapi.Parameter('price_max', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Giá tối đa'),
+    openapi.Parameter('id_min', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='ID tối thiểu'),
+    openapi.Parameter('id_max', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='ID tối đa'),
+    openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Lọc theo status'),
+    openapi.Parameter('has_image', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Đã có ảnh hay chưa'),
+    openapi.Parameter('has_post_id', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Đã có post_id hay chưa'),
+    openapi.Parameter(
+        'ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Sắp xếp theo id, price, updated_at (thêm `-` để giảm dần, vd: -price)'
+    ),
+]
 
+# Query params chọn field trả về (list, retrieve, pending, export)
+sparse_fields_parameters = [
+    openapi.Parameter(
+        'fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Chỉ trả về các field này, cách nhau bởi dấu phẩy (vd: id,name,price)'
+    ),
+    openapi.Parameter(
+        'exclude', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+        description='Bỏ các field này khỏi response, cách nhau bởi dấu phẩy (vd: description,image)'
+    ),
+]
+
+# Các action hỗ trợ ?fields= / ?exclude=
+SPARSE_FIELDS_ACTIONS = ('list', 'retrieve', 'pending_products', 'export')
 
 class ProductViewSet(viewsets.ModelViewSet):
     """
@@ -28,15 +123,28 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     Cung cấp các endpoints để quản lý sản phẩm và upload ảnh lên MinIO storage.
     """
-    queryset = Product.objects.all()
+    # search_vector chỉ dùng trong WHERE, không cần đọc ra
+    queryset = Product.objects.defer('search_vector')
     serializer_class = ProductSerializer
     parser_classes = [JSONParser, MultiPartParser, FormParser]
+    pagination_class = ProductCursorPagination
+    filter_backends = [ProductSearchFilter, ProductFilter, ProductOrderingFilter]
+    renderer_classes = [ORJSONRenderer] + ([BrowsableAPIRenderer] if settings.DEBUG else [])
+    # list/pending đọc bằng .values() thay vì ModelSerializer (xem _values_list_response)
+    fast_list_serialization = True
+    
+    def initialize_request(self, request, *args, **kwargs):
+        """Upload ảnh: kiểm tra kích thước/định dạng và hash ngay trong lúc nhận body"""
+        request = super().initialize_request(request, *args, **kwargs)
+        if self.action == 'upload_image':
+            request.upload_handlers = [ImageStreamUploadHandler(request)]
+        return request
     
     def get_serializer_class(self):
         """Chọn serializer phù hợp cho từng action"""
-        if self.action == 'list':
+        if self.action in ('list', 'pending_products', 'export'):
             return ProductListSerializer
-        elif self.action == 'create':
+        elif self.action in ('create', 'bulk_create'):
             return ProductCreateSerializer
         elif self.action == 'upload_image':
             return ProductImageUploadSerializer
@@ -44,8 +152,125 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductUpdateDescriptionSerializer
         elif self.action == 'update_post_id':
             return ProductUpdatePostIdSerializer
+        elif self.action == 'presign_image_upload':
+            return ProductImagePresignSerializer
+        elif self.action == 'complete_image_upload':
+            return ProductImageCompleteSerializer
+        elif self.action == 'upload_job_status':
+            return ImageUploadJobSerializer
+        elif self.action == 'bulk_update_post_id':
+            return ProductBulkUpdatePostIdSerializer
+        elif self.action == 'claim_pending':
+            return ProductClaimSerializer
+        elif self.action == 'release_pending':
+            return ProductReleaseSerializer
         return ProductSerializer
     
+    def get_sparse_fields(self):
+        """Danh sách field client yêu cầu qua `?fields=`/`?exclude=`, None nếu không yêu cầu"""
+        if self.action not in SPARSE_FIELDS_ACTIONS:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = parse_sparse_fields(
+                self.request.query_params,
+                list(self.get_serializer_class().Meta.fields)
+            )
+        return self._sparse_fields
+    
+    def _only_sparse_fields(self, queryset):
+        """Chỉ SELECT các cột client yêu cầu (bỏ description/image nếu không cần)"""
+        fields = self.get_sparse_fields()
+        if fields:
+            queryset = queryset.only(*fields)
+        return queryset
+    
+    def get_queryset(self):
+        return self._only_sparse_fields(super().get_queryset())
+    
+    def get_pending_queryset(self):
+        """Sản phẩm chưa xử lý (status = False)"""
+        return self._only_sparse_fields(Product.objects.defer('search_vector').filter(status=False))
+    
+    @property
+    def paginator(self):
+        """Kết quả search (`?q=`) dùng page number pagination thay cho cursor"""
+        if not hasattr(self, '_paginator'):
+            if ProductSearchFilter.is_requested(self.request):
+                self._paginator = ProductSearchPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+    
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+    
+    def get_version(self):
+        """Version (token, last_modified) của dữ liệu action hiện tại trả về, dùng cho ETag"""
+        if self.action == 'retrieve':
+            try:
+                return object_version(Product.objects.filter(pk=self.kwargs['pk']))
+            except (TypeError, ValueError):
+                # pk không hợp lệ: để retrieve trả 404 như bình thường
+                return None, None
+        if self.action == 'pending_products':
+            return queryset_version(self.get_pending_queryset())
+        return queryset_version(self.filter_queryset(self.get_queryset()))
+    
+    def _list_response(self, queryset):
+        """
+        Trả về danh sách sản phẩm
+
+        Nếu client gửi `cursor`/`page_size` thì dùng cursor pagination
+        ({next, previous, results}), ngược lại giữ format cũ {count, results}.
+        """
+        if self.fast_list_serialization:
+            return self._values_list_response(queryset)
+        
+        if self.paginator.is_requested(self.request):
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response({
+            'count': queryset.count(),
+            'results': serializer.data
+        }, status=status.HTTP_200_OK)
+    
+    def _values_list_response(self, queryset):
+        """
+        Giống `_list_response` nhưng đọc row bằng `.values()` thay vì tạo model
+        instance và chạy ModelSerializer từng field; output giữ nguyên format
+        """
+        representation = ValuesRepresentation(self.get_serializer_class(), self.get_sparse_fields())
+        
+        if self.paginator.is_requested(self.request):
+            # Cursor pagination cần giá trị của các cột sort để tạo cursor
+            extra_fields = []
+            if isinstance(self.paginator, CursorPagination):
+                extra_fields = [
+                    name for name in (
+                        field.lstrip('-')
+                        for field in self.paginator.get_ordering(self.request, queryset, self)
+                    )
+                    if name not in representation.fields
+                ]
+            page = self.paginate_queryset(queryset.values(*representation.fields, *extra_fields))
+            # Link next/previous tính từ giá trị gốc trong DB nên phải tạo response trước,
+            # sau đó mới format các row (sửa trực tiếp, response giữ cùng list)
+            response = self.get_paginated_response(page)
+            representation.to_representation(page, extra_fields)
+            return response
+        
+        rows = representation.to_representation(list(queryset.values(*representation.fields)))
+        return Response({
+            'count': len(rows),
+            'results': rows
+        }, status=status.HTTP_200_OK)
+    
     @swagger_auto_schema(
         operation_summary="Tạo sản phẩm mới",
         operation_description="""
@@ -74,26 +299,120 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Tạo product với các giá trị mặc định
-        product = Product.objects.create(
-            name=serializer.validated_data['name'],
-            price=serializer.validated_data['price'],
-            description=serializer.validated_data.get('description', ''),
-            image='',
-            post_id='',
-            status=False
-        )
+        # Tạo product với các giá trị mặc định, event được ghi cùng transaction
+        with transaction.atomic():
+            product = Product.objects.create(
+                name=serializer.validated_data['name'],
+                price=serializer.validated_data['price'],
+                description=serializer.validated_data.get('description', ''),
+                image='',
+                post_id='',
+                status=False
+            )
+            data = product_payload(product)
+            enqueue_event(OutboxEvent.TYPE_PRODUCT_CREATED, data)
         
         # Trả về response với serializer đầy đủ
-        response_serializer = ProductSerializer(product)
-        return Response(
-            response_serializer.data,
-            status=status.HTTP_201_CREATED
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @swagger_auto_schema(
+        operation_summary="Tạo nhiều sản phẩm cùng lúc",
+        operation_description="""
+        Tạo nhiều sản phẩm trong một request (import catalog).
+        
+        **Flow:**
+        1. Validate từng phần tử bằng ProductCreateSerializer
+        2. Nếu có phần tử lỗi: trả về 400 kèm lỗi theo index, không tạo sản phẩm nào
+        3. Insert theo batch (`PRODUCT_BULK_BATCH_SIZE`) trong một transaction
+        
+        Tối đa `PRODUCT_BULK_MAX_ITEMS` phần tử mỗi request.
+        """,
+        request_body=ProductCreateSerializer(many=True),
+        responses={
+            201: openapi.Response(
+                description="Tạo thành công",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'count': openapi.Schema(type=openapi.TYPE_INTEGER, description='Số sản phẩm đã tạo'),
+                        'ids': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                            description='ID các sản phẩm đã tạo, theo thứ tự request'
+                        )
+                    }
+                )
+            ),
+            400: "Bad Request - Danh sách lỗi theo index"
+        }
+    )
+    def bulk_create(self, request):
+        """
+        Tạo nhiều sản phẩm
+        POST /api/products/bulk/
+        Body: [
+            {"name": "Sản phẩm 1", "price": 100000, "description": "Mô tả"},
+            {"name": "Sản phẩm 2", "price": 200000, "description": "Mô tả"}
+        ]
+        """
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            max_length=settings.PRODUCT_BULK_MAX_ITEMS
         )
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                # Chỉ trả về các phần tử lỗi kèm index trong request
+                errors = [
+                    {'index': index, 'errors': item_errors}
+                    for index, item_errors in enumerate(errors)
+                    if item_errors
+                ]
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        products = [
+            Product(
+                name=item['name'],
+                price=item['price'],
+                description=item.get('description', ''),
+                image='',
+                post_id='',
+                status=False
+            )
+            for item in serializer.validated_data
+        ]
+        with transaction.atomic():
+            products = Product.objects.bulk_create(
+                products,
+                batch_size=settings.PRODUCT_BULK_BATCH_SIZE
+            )
+            enqueue_events(OutboxEvent.TYPE_PRODUCT_CREATED, (product_payload(product) for product in products))
+            record_changes(ProductChange.OPERATION_CREATED, (product.id for product in products))
+            # bulk_create/bulk_update/update() không gửi signal post_save
+            invalidate_product_cache()
+        
+        return Response({
+            'count': len(products),
+            'ids': [product.id for product in products]
+        }, status=status.HTTP_201_CREATED)
     
     @swagger_auto_schema(
         operation_summary="Lấy danh sách sản phẩm",
-        operation_description="Lấy danh sách tất cả sản phẩm trong hệ thống",
+        operation_description="""
+        Lấy danh sách tất cả sản phẩm trong hệ thống.
+        
+        Gửi `page_size` (và `cursor` cho các trang sau) để dùng cursor pagination
+        theo id, response khi đó có dạng {next, previous, results}.
+        
+        Gửi `q` để tìm kiếm full-text theo tên và mô tả; kết quả sắp xếp theo độ liên quan
+        và có dạng {count, next, previous, results}.
+        
+        Lọc theo giá, status, id, có ảnh/post_id và sắp xếp bằng `ordering`
+        (chỉ các field có index: id, price, updated_at; field khác trả 400).
+        """,
+        manual_parameters=search_parameters + filter_parameters + cursor_pagination_parameters + sparse_fields_parameters,
         responses={
             200: openapi.Response(
                 description="Danh sách sản phẩm",
@@ -110,26 +429,180 @@ class ProductViewSet(viewsets.ModelViewSet):
             )
         }
     )
+    @conditional_response
+    @cached_response
     def list(self, request, *args, **kwargs):
         """
         Lấy danh sách tất cả sản phẩm
         GET /api/products/
         """
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        return self._list_response(queryset)
+    
+    @action(detail=False, methods=['get'], url_path='export')
+    @swagger_auto_schema(
+        operation_summary="Export toàn bộ sản phẩm",
+        operation_description="""
+        Stream toàn bộ catalog (các field của ProductListSerializer) dưới dạng NDJSON hoặc CSV.
+        
+        Dữ liệu được đọc theo chunk từ server-side cursor và ghi dần ra response,
+        nên bộ nhớ không tăng theo số lượng sản phẩm.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'output', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=['ndjson', 'csv'], default='ndjson',
+                description='Định dạng export'
+            ),
+        ] + sparse_fields_parameters,
+        responses={
+            200: "Stream NDJSON (application/x-ndjson) hoặc CSV (text/csv)",
+            400: "Bad Request - Định dạng không hợp lệ"
+        }
+    )
+    def export(self, request):
+        """
+        Export sản phẩm
+        GET /api/products/export/?output=ndjson
+        GET /api/products/export/?output=csv
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            return Response(
+                {'error': 'Định dạng không hợp lệ. Chỉ chấp nhận: ndjson, csv'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        fields = self.get_sparse_fields() or list(ProductListSerializer.Meta.fields)
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .order_by('id')
+            .values_list(*fields)
+            .iterator(chunk_size=settings.PRODUCT_EXPORT_CHUNK_SIZE)
+        )
+        
+        if output == 'csv':
+            response = streaming_response(request, iter_csv(rows, fields), content_type='text/csv; charset=utf-8')
+        else:
+            response = streaming_response(request, iter_ndjson(rows, fields), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="products.{output}"'
+        return response
+    
+    @action(detail=False, methods=['get'], url_path='changes')
+    @swagger_auto_schema(
+        operation_summary="Change feed (đồng bộ incremental)",
+        operation_description="""
+        Trả các thay đổi (tạo, sửa, xóa) sau cursor `since`, để client mirror chỉ kéo phần thay đổi
+        thay vì tải lại toàn bộ catalog.
+        
+        **Flow:**
+        1. Lần đầu: gọi với `since=0` (hoặc export toàn bộ rồi bắt đầu từ cursor hiện tại)
+        2. Lưu `next_since`, lần sau gọi tiếp với `since=<next_since>`; lặp khi `has_more` = true
+        3. `op` = created/updated: upsert `data` (trạng thái hiện tại); `op` = deleted: xóa theo `id`
+        
+        Cursor có dạng `<txid>:<id>` (số nguyên đơn vẫn được chấp nhận). Thay đổi của transaction
+        chưa commit, hoặc commit sau một transaction cũ hơn còn đang chạy, được trả ở lần gọi sau
+        nên không bị cursor bỏ qua.
+        `output=ndjson` stream toàn bộ thay đổi, dòng cuối là {"next_since": ...}.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'since', openapi.IN_QUERY, type=openapi.TYPE_STRING, default='0',
+                description='Cursor (`next_since` của lần gọi trước)'
+            ),
+            openapi.Parameter(
+                'limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description='Số change mỗi trang (mặc định PRODUCT_CHANGES_PAGE_SIZE)'
+            ),
+            openapi.Parameter(
+                'output', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                enum=['json', 'ndjson'], default='json',
+                description='json: một trang; ndjson: stream toàn bộ'
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Các thay đổi sau `since`",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'next_since': openapi.Schema(type=openapi.TYPE_STRING, description='Cursor cho lần gọi sau'),
+                        'has_more': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Còn thay đổi sau next_since'),
+                        'results': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'change_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    'op': openapi.Schema(type=openapi.TYPE_STRING, enum=['created', 'updated', 'deleted']),
+                                    'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='ID sản phẩm'),
+                                    'data': openapi.Schema(
+                                        type=openapi.TYPE_OBJECT, ref='#/definitions/Product',
+                                        description='Trạng thái hiện tại, null nếu đã xóa'
+                                    )
+                                }
+                            )
+                        )
+                    }
+                )
+            ),
+            400: "Bad Request - since/limit/output không hợp lệ"
+        }
+    )
+    def changes(self, request):
+        """
+        Change feed
+        GET /api/products/changes/?since=0&limit=500
+        GET /api/products/changes/?since=0&output=ndjson
+        """
+        output = request.query_params.get('output', 'json')
+        if output not in ('json', 'ndjson'):
+            return Response(
+                {'error': 'Định dạng không hợp lệ. Chỉ chấp nhận: json, ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            since = parse_cursor(request.query_params.get('since', 0))
+        except ValueError:
+            return Response(
+                {'error': 'since không hợp lệ (dùng next_since của lần gọi trước)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', settings.PRODUCT_CHANGES_PAGE_SIZE))
+        except ValueError:
+            return Response(
+                {'error': 'limit phải là số nguyên'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response(
+                {'error': 'limit phải > 0'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(limit, settings.PRODUCT_CHANGES_MAX_PAGE_SIZE)
+        
+        if output == 'ndjson':
+            return streaming_response(request, iter_changes_ndjson(since, limit), content_type='application/x-ndjson')
+        
+        results, next_since, has_more = read_changes(since, limit)
         return Response({
-            'count': queryset.count(),
-            'results': serializer.data
-        })
+            'next_since': format_cursor(next_since),
+            'has_more': has_more,
+            'results': results
+        }, status=status.HTTP_200_OK)
     
     @swagger_auto_schema(
         operation_summary="Lấy chi tiết sản phẩm",
         operation_description="Lấy thông tin chi tiết của một sản phẩm theo ID",
+        manual_parameters=sparse_fields_parameters,
         responses={
             200: ProductSerializer,
             404: "Không tìm thấy sản phẩm"
         }
     )
+    @conditional_response
+    @cached_response
     def retrieve(self, request, *args, **kwargs):
         """
         Lấy chi tiết một sản phẩm
@@ -158,10 +631,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
         
-        # Xóa ảnh trên MinIO nếu có
-        if instance.image:
-            minio_service.delete_image(instance.image)
-        
+        # Ảnh trên MinIO được xử lý bởi signal post_delete (xem products/signals.py)
         self.perform_destroy(instance)
         return Response(
             {'message': 'Đã xóa sản phẩm thành công'},
@@ -179,11 +649,22 @@ class ProductViewSet(viewsets.ModelViewSet):
         - Format: JPG, JPEG, PNG, GIF, WEBP
         
         **Flow:**
-        1. Upload file lên MinIO
+        1. Upload file lên MinIO (tên object = SHA-256 nội dung, ảnh trùng không upload lại)
         2. Nhận public URL từ MinIO
-        3. Lưu URL vào database
-        4. Xóa ảnh cũ (nếu có)
+        3. Sinh thumbnail/WebP (200px, 600px) và lưu cạnh ảnh gốc
+        4. Lưu URL và variant map vào database
+        5. Xóa ảnh cũ (nếu có)
+        
+        **Async mode (`?async=true`):** file được đưa vào hàng đợi và xử lý bởi
+        background worker, response trả về ngay 202 kèm `job_id`. Theo dõi tiến trình
+        qua GET /api/products/upload-jobs/{job_id}/.
         """,
+        manual_parameters=[
+            openapi.Parameter(
+                'async', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                description='Upload bất đồng bộ, trả về 202 và job_id'
+            ),
+        ],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             required=['image'],
@@ -202,10 +683,16 @@ class ProductViewSet(viewsets.ModelViewSet):
                     properties={
                         'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Product ID'),
                         'image': openapi.Schema(type=openapi.TYPE_STRING, description='URL ảnh trên MinIO'),
+                        'deduplicated': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='Ảnh trùng nội dung đã có sẵn, không upload lại'),
+                        'bytes_saved': openapi.Schema(type=openapi.TYPE_INTEGER, description='Số byte không phải lưu/truyền nhờ dedup'),
                         'message': openapi.Schema(type=openapi.TYPE_STRING, description='Thông báo'),
                     }
                 )
             ),
+            202: openapi.Response(
+                description="Đã nhận file, đang xử lý (async mode)",
+                schema=ImageUploadJobSerializer
+            ),
             400: "Bad Request - File không hợp lệ",
             500: "Internal Server Error - Lỗi upload lên MinIO"
         }
@@ -219,31 +706,171 @@ class ProductViewSet(viewsets.ModelViewSet):
         
         Response: {
             "id": 1,
-            "image": "http://localhost:9000/products/products/uuid.jpg",
+            "image": "http://localhost:9000/products/<sha256>.jpg",
+            "deduplicated": false,
+            "bytes_saved": 0,
             "message": "Upload ảnh thành công"
         }
         """
         product = self.get_object()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
-        # Upload ảnh lên MinIO
         image_file = serializer.validated_data['image']
-        image_url = minio_service.upload_image(image_file)  # Bỏ folder parameter
         
-        if not image_url:
+        if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+            job = enqueue_image_upload(product, image_file)
+            return Response(
+                ImageUploadJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+        
+        # Upload ảnh lên MinIO (bỏ qua nếu trùng nội dung), cập nhật DB và xóa ảnh cũ
+        stored = replace_product_image(product, image_file)
+        
+        if not stored:
             return Response(
                 {'error': 'Không thể upload ảnh lên MinIO'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Xóa ảnh cũ nếu có
-        if product.image:
-            minio_service.delete_image(product.image)
+        return Response({
+            'id': product.id,
+            'image': stored.url,
+            'deduplicated': not stored.created,
+            'bytes_saved': 0 if stored.created else stored.size,
+            'message': 'Upload ảnh thành công'
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['post'], url_path='upload-image/presign')
+    @swagger_auto_schema(
+        operation_summary="Xin presigned POST để upload ảnh thẳng lên MinIO",
+        operation_description="""
+        Tạo presigned POST policy để client upload ảnh trực tiếp lên MinIO,
+        dữ liệu ảnh không đi qua Django.
+        
+        **Flow:**
+        1. Gọi endpoint này với `filename` và `content_type`
+        2. Gửi multipart POST tới `url` với toàn bộ `fields` + field `file` (đặt cuối cùng)
+        3. Gọi upload-image/complete/ với `upload_token` để gắn ảnh vào sản phẩm
+        
+        Policy bắt buộc đúng tên object, Content-Type và kích thước tối đa 5MB.
+        """,
+        request_body=ProductImagePresignSerializer,
+        responses={
+            200: openapi.Response(
+                description="Presigned POST policy",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'url': openapi.Schema(type=openapi.TYPE_STRING, description='URL để POST form'),
+                        'fields': openapi.Schema(type=openapi.TYPE_OBJECT, description='Các field form bắt buộc'),
+                        'upload_token': openapi.Schema(type=openapi.TYPE_STRING, description='Token dùng cho upload-image/complete/'),
+                        'expires_in': openapi.Schema(type=openapi.TYPE_INTEGER, description='Thời gian hiệu lực (giây)'),
+                    }
+                )
+            ),
+            400: "Bad Request - Định dạng file không hợp lệ",
+            404: "Không tìm thấy sản phẩm",
+            500: "Internal Server Error - Không tạo được policy"
+        }
+    )
+    def presign_image_upload(self, request, pk=None):
+        """
+        Xin presigned POST policy
+        POST /api/products/{id}/upload-image/presign/
+        Body: {
+            "filename": "photo.jpg",
+            "content_type": "image/jpeg"
+        }
+        """
+        product = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Cập nhật link ảnh vào database
-        product.image = image_url
-        product.save()
+        object_name = minio_service.build_object_name(serializer.validated_data['filename'])
+        expiry = settings.MINIO_PRESIGNED_UPLOAD_EXPIRY
+        presigned = minio_service.get_presigned_upload(
+            object_name,
+            serializer.validated_data['content_type'],
+            MAX_IMAGE_SIZE,
+            expiry=expiry
+        )
+        if not presigned:
+            return Response(
+                {'error': 'Không thể tạo presigned upload policy'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            **presigned,
+            'upload_token': create_upload_token(product, object_name),
+            'expires_in': expiry
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['post'], url_path='upload-image/complete')
+    @swagger_auto_schema(
+        operation_summary="Xác nhận upload ảnh qua presigned POST",
+        operation_description="""
+        Kiểm tra object đã tồn tại trên MinIO (đúng kích thước, nội dung là ảnh
+        khớp đuôi file), sau đó gắn URL vào sản phẩm và xóa ảnh cũ (nếu có).
+        Object không hợp lệ bị xóa khỏi MinIO.
+        """,
+        request_body=ProductImageCompleteSerializer,
+        responses={
+            200: openapi.Response(
+                description="Gắn ảnh thành công",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Product ID'),
+                        'image': openapi.Schema(type=openapi.TYPE_STRING, description='URL ảnh trên MinIO'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Thông báo'),
+                    }
+                )
+            ),
+            400: "Bad Request - Token không hợp lệ hoặc file chưa được upload",
+            404: "Không tìm thấy sản phẩm"
+        }
+    )
+    def complete_image_upload(self, request, pk=None):
+        """
+        Xác nhận upload ảnh
+        POST /api/products/{id}/upload-image/complete/
+        Body: {
+            "upload_token": "..."
+        }
+        """
+        product = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            object_name = read_upload_token(product, serializer.validated_data['upload_token'])
+        except signing.BadSignature:
+            return Response(
+                {'error': 'Upload token không hợp lệ hoặc đã hết hạn'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        stat = minio_service.stat_image(object_name)
+        if stat is None:
+            return Response(
+                {'error': 'Chưa tìm thấy file trên MinIO'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (
+            stat.size > MAX_IMAGE_SIZE
+            or stat.content_type not in IMAGE_CONTENT_TYPES.values()
+            or not check_uploaded_image(object_name)
+        ):
+            # Object chưa được gắn vào product nào nên xóa luôn
+            enqueue_object_deletions([object_name])
+            return Response(
+                {'error': 'File trên MinIO không hợp lệ (tối đa 5MB, jpg/png/gif/webp)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        image_url = attach_uploaded_object(product, object_name, stat.size)
         
         return Response({
             'id': product.id,
@@ -251,6 +878,61 @@ class ProductViewSet(viewsets.ModelViewSet):
             'message': 'Upload ảnh thành công'
         }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['get'], url_path=r'upload-jobs/(?P<job_id>[0-9a-fA-F-]{36})')
+    @swagger_auto_schema(
+        operation_summary="Trạng thái job upload ảnh",
+        operation_description="""
+        Lấy trạng thái của job upload ảnh bất đồng bộ.
+        
+        `status`: pending → processing → succeeded | failed.
+        Khi succeeded, `image` là URL ảnh trên MinIO.
+        """,
+        responses={
+            200: ImageUploadJobSerializer,
+            404: "Không tìm thấy job"
+        }
+    )
+    def upload_job_status(self, request, job_id=None):
+        """
+        Lấy trạng thái job upload ảnh
+        GET /api/products/upload-jobs/{job_id}/
+        """
+        job = get_object_or_404(ImageUploadJob, id=job_id)
+        serializer = self.get_serializer(job)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], url_path='storage-stats')
+    @swagger_auto_schema(
+        operation_summary="Thống kê dung lượng ảnh",
+        operation_description="""
+        Thống kê object ảnh trên MinIO.
+        
+        - `stored_bytes`: dung lượng thực lưu trên bucket
+        - `referenced_bytes`: dung lượng nếu mỗi product lưu một bản riêng
+        - `bytes_saved`: dung lượng tiết kiệm nhờ dedup theo nội dung
+        """,
+        responses={
+            200: openapi.Response(
+                description="Thống kê dung lượng",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'objects': openapi.Schema(type=openapi.TYPE_INTEGER, description='Số object ảnh'),
+                        'stored_bytes': openapi.Schema(type=openapi.TYPE_INTEGER, description='Dung lượng thực lưu'),
+                        'referenced_bytes': openapi.Schema(type=openapi.TYPE_INTEGER, description='Dung lượng theo số tham chiếu'),
+                        'bytes_saved': openapi.Schema(type=openapi.TYPE_INTEGER, description='Dung lượng tiết kiệm'),
+                    }
+                )
+            )
+        }
+    )
+    def storage_stats(self, request):
+        """
+        Thống kê dung lượng ảnh
+        GET /api/products/storage-stats/
+        """
+        return Response(storage_stats(), status=status.HTTP_200_OK)
+    
     @action(detail=True, methods=['patch'], url_path='update-description')
     @swagger_auto_schema(
         operation_summary="Cập nhật mô tả sản phẩm",
@@ -285,7 +967,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         operation_description="""
         Cập nhật post_id cho sản phẩm.
         
-        **Lưu ý:** Khi cập nhật post_id, status sẽ tự động được set thành True.
+        **Lưu ý:** Khi cập nhật post_id, status sẽ tự động được set thành True
+        và lease (nếu sản phẩm đang được worker claim) sẽ được giải phóng.
         """,
         request_body=ProductUpdatePostIdSerializer,
         responses={
@@ -305,15 +988,108 @@ class ProductViewSet(viewsets.ModelViewSet):
         product = self.get_object()
         serializer = self.get_serializer(product, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
         
-        # Tự động cập nhật status = True khi có post_id
-        product.status = True
-        product.save()
+        with transaction.atomic():
+            serializer.save()
+            
+            # Tự động cập nhật status = True khi có post_id và giải phóng lease (ack)
+            product.status = True
+            product.claimed_by = ''
+            product.lease_expires_at = None
+            product.save()
+            
+            data = product_payload(product)
+            enqueue_event(OutboxEvent.TYPE_PRODUCT_POST_ID_UPDATED, data)
         
         # Trả về dữ liệu đầy đủ
-        response_serializer = ProductSerializer(product)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['patch'], url_path='bulk-update-post-id')
+    @swagger_auto_schema(
+        operation_summary="Cập nhật post_id cho nhiều sản phẩm",
+        operation_description="""
+        Cập nhật post_id cho nhiều sản phẩm trong một request (sau mỗi đợt đăng bài của n8n).
+        
+        Giống update-post-id: status được set thành True và lease được giải phóng.
+        Toàn bộ thay đổi được ghi bằng batch UPDATE trong một transaction.
+        ID không tồn tại được trả về trong `missing`, không làm lỗi cả request.
+        """,
+        request_body=ProductBulkUpdatePostIdSerializer,
+        responses={
+            200: openapi.Response(
+                description="Kết quả cập nhật",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'updated': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                            description='ID đã được cập nhật'
+                        ),
+                        'missing': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                            description='ID không tồn tại'
+                        )
+                    }
+                )
+            ),
+            400: "Bad Request - Dữ liệu không hợp lệ"
+        }
+    )
+    def bulk_update_post_id(self, request):
+        """
+        Cập nhật post_id cho nhiều sản phẩm
+        PATCH /api/products/bulk-update-post-id/
+        Body: {
+            "items": [
+                {"id": 1, "post_id": "12345"},
+                {"id": 2, "post_id": "12346"}
+            ]
+        }
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        # Nếu một id xuất hiện nhiều lần thì lấy post_id cuối cùng
+        assignments = {
+            item['id']: item['post_id']
+            for item in serializer.validated_data['items']
+        }
+        
+        updated_at = timezone.now()
+        with transaction.atomic():
+            # Đọc cả row để event có payload đầy đủ như update-post-id
+            products = list(
+                Product.objects.select_for_update()
+                .filter(id__in=assignments.keys())
+                .order_by('id')
+            )
+            for product in products:
+                product.post_id = assignments[product.id]
+                product.status = True
+                product.claimed_by = ''
+                product.lease_expires_at = None
+                # bulk_update không tự cập nhật field auto_now
+                product.updated_at = updated_at
+            Product.objects.bulk_update(
+                products,
+                ['post_id', 'status', 'claimed_by', 'lease_expires_at', 'updated_at'],
+                batch_size=settings.PRODUCT_BULK_BATCH_SIZE
+            )
+            updated_ids = [product.id for product in products]
+            enqueue_events(
+                OutboxEvent.TYPE_PRODUCT_POST_ID_UPDATED,
+                (product_payload(product) for product in products)
+            )
+            record_changes(ProductChange.OPERATION_UPDATED, updated_ids)
+            invalidate_product_cache()
+        
+        found = set(updated_ids)
+        return Response({
+            'updated': updated_ids,
+            'missing': sorted(product_id for product_id in assignments if product_id not in found)
+        }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'], url_path='pending')
     @swagger_auto_schema(
@@ -324,7 +1100,10 @@ class ProductViewSet(viewsets.ModelViewSet):
         Các sản phẩm này thường là:
         - Sản phẩm mới tạo chưa có post_id
         - Sản phẩm chưa được đăng lên platform
+        
+        Hỗ trợ cursor pagination giống GET /api/products/ (`page_size`, `cursor`).
         """,
+        manual_parameters=cursor_pagination_parameters + sparse_fields_parameters,
         responses={
             200: openapi.Response(
                 description="Danh sách sản phẩm pending",
@@ -341,17 +1120,141 @@ class ProductViewSet(viewsets.ModelViewSet):
             )
         }
     )
+    @conditional_response
+    @cached_response
     def pending_products(self, request):
         """
         Lấy danh sách sản phẩm chưa xử lý (status = False)
         GET /api/products/pending/
         """
-        pending_products = Product.objects.filter(status=False)
-        serializer = ProductListSerializer(pending_products, many=True)
+        return self._list_response(self.get_pending_queryset())
+    
+    @action(detail=False, methods=['post'], url_path='pending/claim')
+    @swagger_auto_schema(
+        operation_summary="Claim sản phẩm pending cho worker",
+        operation_description="""
+        Lease tối đa `limit` sản phẩm pending (status = False) cho một worker.
+        
+        **Flow:**
+        1. Khóa các row chưa bị lease (hoặc lease đã hết hạn) với `SELECT ... FOR UPDATE SKIP LOCKED`
+        2. Gán `claimed_by` và `lease_expires_at` cho các row đó
+        3. Worker xử lý xong thì gọi update-post-id (ack), hoặc gọi pending/release để trả lại
+        
+        Các worker chạy song song không bao giờ nhận cùng một sản phẩm
+        và không phải chờ lock của nhau.
+        """,
+        request_body=ProductClaimSerializer,
+        responses={
+            200: openapi.Response(
+                description="Danh sách sản phẩm đã được lease cho worker",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'worker_id': openapi.Schema(type=openapi.TYPE_STRING, description='Worker ID'),
+                        'lease_expires_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Thời điểm hết hạn lease'),
+                        'count': openapi.Schema(type=openapi.TYPE_INTEGER, description='Số sản phẩm đã claim'),
+                        'results': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT, ref='#/definitions/ProductList')
+                        )
+                    }
+                )
+            ),
+            400: "Bad Request - Dữ liệu không hợp lệ"
+        }
+    )
+    def claim_pending(self, request):
+        """
+        Claim sản phẩm pending
+        POST /api/products/pending/claim/
+        Body: {
+            "worker_id": "n8n-worker-1",
+            "limit": 10,
+            "lease_seconds": 300
+        }
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        worker_id = serializer.validated_data['worker_id']
+        
+        now = timezone.now()
+        lease_expires_at = now + timedelta(seconds=serializer.validated_data['lease_seconds'])
+        
+        with transaction.atomic():
+            # Bỏ qua các row đang bị worker khác khóa thay vì chờ
+            claimed_ids = list(
+                Product.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=False)
+                .filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+                .order_by('id')
+                .values_list('id', flat=True)[:serializer.validated_data['limit']]
+            )
+            Product.objects.filter(id__in=claimed_ids).update(
+                claimed_by=worker_id,
+                lease_expires_at=lease_expires_at
+            )
+        
+        claimed_products = Product.objects.filter(id__in=claimed_ids).order_by('id')
+        response_serializer = ProductListSerializer(claimed_products, many=True)
         return Response({
-            'count': pending_products.count(),
-            'results': serializer.data
+            'worker_id': worker_id,
+            'lease_expires_at': lease_expires_at,
+            'count': len(claimed_ids),
+            'results': response_serializer.data
         }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='pending/release')
+    @swagger_auto_schema(
+        operation_summary="Trả lại sản phẩm đã claim",
+        operation_description="""
+        Giải phóng lease của các sản phẩm mà worker đã claim nhưng không xử lý,
+        để worker khác có thể claim ngay mà không cần chờ lease hết hạn.
+        
+        Chỉ các sản phẩm đang được lease bởi chính `worker_id` mới được giải phóng.
+        """,
+        request_body=ProductReleaseSerializer,
+        responses={
+            200: openapi.Response(
+                description="Danh sách ID đã được giải phóng",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'released': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_INTEGER)
+                        )
+                    }
+                )
+            ),
+            400: "Bad Request - Dữ liệu không hợp lệ"
+        }
+    )
+    def release_pending(self, request):
+        """
+        Trả lại sản phẩm đã claim
+        POST /api/products/pending/release/
+        Body: {
+            "worker_id": "n8n-worker-1",
+            "ids": [1, 2, 3]
+        }
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            leased = Product.objects.select_for_update().filter(
+                id__in=serializer.validated_data['ids'],
+                claimed_by=serializer.validated_data['worker_id'],
+                status=False
+            )
+            released_ids = sorted(leased.values_list('id', flat=True))
+            Product.objects.filter(id__in=released_ids).update(
+                claimed_by='',
+                lease_expires_at=None
+            )
+        
+        return Response({'released': released_ids}, status=status.HTTP_200_OK)
 
 
 # ---- HTML view riêng (không nằm trong ViewSet) ----
@@ -385,3 +1288,23 @@ class ProductHTMLView(View):
         }
         return HttpResponse(template.render(context, request))
 
+
+
+# ---- Prometheus metrics (xem products/metrics.py) ----
+class MetricsView(View):
+    """
+    Metrics (cộng dồn mọi worker) theo format text của Prometheus
+
+    Chỉ cho staff đã đăng nhập hoặc scraper gửi `Authorization: Bearer <PRODUCT_METRICS_TOKEN>`.
+    """
+    
+    def get(self, request):
+        if not settings.PRODUCT_METRICS_ENABLED:
+            raise Http404
+        token = settings.PRODUCT_METRICS_TOKEN
+        has_token = bool(token) and constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        )
+        if not (has_token or request.user.is_staff):
+            return HttpResponseForbidden('Forbidden', content_type='text/plain; charset=utf-8')
+        return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')